@@ -0,0 +1,42 @@
+"""create_precomputed_forecasts_table
+
+Revision ID: 5b1e7c9d2a40
+Revises: 36ddcb12db54
+Create Date: 2026-10-17 10:12:41.118307
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1e7c9d2a40'
+down_revision: Union[str, Sequence[str], None] = '36ddcb12db54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('precomputed_forecasts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('series_id', sa.String(), nullable=False),
+    sa.Column('model_version', sa.String(), nullable=False),
+    sa.Column('start_date', sa.DateTime(), nullable=False),
+    sa.Column('horizon', sa.Integer(), nullable=False),
+    sa.Column('values_json', postgresql.JSON(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('series_id', 'model_version', name='unique_forecast_version')
+    )
+    op.create_index(op.f('ix_precomputed_forecasts_id'), 'precomputed_forecasts', ['id'], unique=False)
+    op.create_index('ix_precomputed_forecasts_series_id_created_at', 'precomputed_forecasts', ['series_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_precomputed_forecasts_series_id_created_at', table_name='precomputed_forecasts')
+    op.drop_index(op.f('ix_precomputed_forecasts_id'), table_name='precomputed_forecasts')
+    op.drop_table('precomputed_forecasts')
@@ -0,0 +1,37 @@
+"""add_raw_series_series_id_date_unique
+
+Revision ID: a3f4d8e21c57
+Revises: 5b1e7c9d2a40
+Create Date: 2026-10-17 11:02:19.504217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f4d8e21c57'
+down_revision: Union[str, Sequence[str], None] = '5b1e7c9d2a40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Drop duplicate observations (keep the newest row) so the unique index can be built
+    op.execute("""
+        DELETE FROM raw_series a
+        USING raw_series b
+        WHERE a.series_id = b.series_id
+          AND a.date = b.date
+          AND a.id < b.id
+    """)
+    # Conflict target for the ingestion upsert (INSERT ... ON CONFLICT (series_id, date))
+    op.create_index('uq_raw_series_series_id_date', 'raw_series', ['series_id', 'date'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_raw_series_series_id_date', table_name='raw_series')
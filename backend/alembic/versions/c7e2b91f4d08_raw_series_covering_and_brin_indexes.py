@@ -0,0 +1,39 @@
+"""raw_series_covering_and_brin_indexes
+
+Revision ID: c7e2b91f4d08
+Revises: a3f4d8e21c57
+Create Date: 2026-10-17 14:36:52.271940
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e2b91f4d08'
+down_revision: Union[str, Sequence[str], None] = 'a3f4d8e21c57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Rebuild the (series_id, date) unique index as a covering index: per-series reads
+    # ordered by date (history, training loads, fingerprints) become index-only scans.
+    op.drop_index('uq_raw_series_series_id_date', table_name='raw_series')
+    op.create_index('uq_raw_series_series_id_date', 'raw_series', ['series_id', 'date'],
+                    unique=True, postgresql_include=['value'])
+    # Redundant: series_id is the leading column of the composite index
+    op.drop_index('ix_raw_series_series_id', table_name='raw_series')
+    # Tiny index for cross-series date-range scans; rows arrive roughly in date order
+    op.create_index('ix_raw_series_date_brin', 'raw_series', ['date'], postgresql_using='brin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_raw_series_date_brin', table_name='raw_series')
+    op.create_index('ix_raw_series_series_id', 'raw_series', ['series_id'], unique=False)
+    op.drop_index('uq_raw_series_series_id_date', table_name='raw_series')
+    op.create_index('uq_raw_series_series_id_date', 'raw_series', ['series_id', 'date'], unique=True)
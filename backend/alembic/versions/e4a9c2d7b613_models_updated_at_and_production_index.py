@@ -0,0 +1,57 @@
+"""models_updated_at_and_production_index
+
+Revision ID: e4a9c2d7b613
+Revises: c7e2b91f4d08
+Create Date: 2026-10-17 19:12:40.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a9c2d7b613'
+down_revision: Union[str, Sequence[str], None] = 'c7e2b91f4d08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Change marker for the API's registry snapshot: COUNT(*) + MAX(updated_at)
+    # changes on every insert, delete, promotion or rollback
+    op.add_column('models', sa.Column('updated_at', sa.DateTime(timezone=True),
+                                      server_default=sa.text('now()'), nullable=False))
+    op.execute("UPDATE models SET updated_at = COALESCE(created_at, now())")
+    op.execute("""
+        CREATE FUNCTION models_touch_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at = now();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER models_touch_updated_at BEFORE UPDATE ON models
+        FOR EACH ROW EXECUTE FUNCTION models_touch_updated_at()
+    """)
+
+    # At most one production version per model name (keep the newest if several are flagged)
+    op.execute("""
+        UPDATE models SET is_production = false
+        WHERE is_production AND id NOT IN (
+            SELECT DISTINCT ON (name) id FROM models WHERE is_production ORDER BY name, created_at DESC, id DESC
+        )
+    """)
+    op.create_index('uq_models_name_production', 'models', ['name'], unique=True,
+                    postgresql_where=sa.text('is_production'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_models_name_production', table_name='models')
+    op.execute("DROP TRIGGER models_touch_updated_at ON models")
+    op.execute("DROP FUNCTION models_touch_updated_at()")
+    op.drop_column('models', 'updated_at')
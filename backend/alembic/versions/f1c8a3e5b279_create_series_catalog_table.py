@@ -0,0 +1,50 @@
+"""create_series_catalog_table
+
+Revision ID: f1c8a3e5b279
+Revises: e4a9c2d7b613
+Create Date: 2026-10-17 21:05:12.331870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c8a3e5b279'
+down_revision: Union[str, Sequence[str], None] = 'e4a9c2d7b613'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # One row per series, maintained by ingestion (ingest_data.save_to_db), so listing
+    # materials and fingerprinting a series never scan raw_series
+    op.create_table(
+        'series_catalog',
+        sa.Column('series_id', sa.String(), primary_key=True),
+        sa.Column('source', sa.String(), nullable=True),
+        sa.Column('first_date', sa.DateTime(), nullable=False),
+        sa.Column('last_date', sa.DateTime(), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=False),
+        sa.Column('last_ingest_hash', sa.String(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+
+    # Backfill from the existing rows (same aggregate as ingestion)
+    op.execute("""
+        INSERT INTO series_catalog (series_id, source, first_date, last_date, row_count, last_ingest_hash)
+        SELECT series_id,
+               (array_agg(source ORDER BY date DESC))[1],
+               MIN(date), MAX(date), COUNT(*),
+               md5(string_agg(to_char(date, 'YYYY-MM-DD') || '=' || value::text, ',' ORDER BY date))
+        FROM raw_series
+        GROUP BY series_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('series_catalog')
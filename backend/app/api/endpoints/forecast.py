@@ -1,127 +1,526 @@
-import os
-import redis
-import json
+import time
+import gzip
+import asyncio
+import hashlib
 import traceback
-from fastapi import APIRouter, HTTPException
-from app.schemas.forecasting import ForecastResponse
-from app.services.forecasting import generate_forecast
-from app.database import get_available_materials
-from app.database.crud_forecast import get_historical_data
-from app.core.artifact_manager import ArtifactManager
-
-# --- Router and Redis Connection ---
-router = APIRouter()
-redis_url = os.getenv("REDISCLOUD_URL") or os.getenv("REDIS_URL") or "redis://redis:6379/0"
-redis_client = None
+from datetime import date, datetime
+from datetime import time as day_start
+from typing import List, Literal, Optional
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
+from app.schemas.forecasting import (
+    ForecastResponse,
+    SeriesCatalogItem,
+    BatchForecastRequest,
+    BatchForecastResponse,
+    BatchForecastResult,
+    ScenarioResponse,
+    ScenarioResult,
+)
+from app.services.forecasting import (
+    MAX_FORECAST_HORIZON,
+    MAX_REQUEST_HORIZON,
+    SCENARIO_PATHS,
+    SCENARIO_MAX_PATHS,
+    SCENARIO_MAX_HORIZON,
+    DEFAULT_SCENARIO_QUANTILES,
+    build_forecast_vector,
+    build_forecast_vectors,
+    build_scenario_tables,
+    quantile_label,
+    slice_forecast_vector,
+    slice_scenario_table,
+)
+from app.database.crud_forecast import (
+    get_historical_page_async,
+    get_series_marker_async,
+    get_precomputed_forecast_async,
+    get_precomputed_forecasts_async,
+)
+from app.core.artifact_manager import get_artifact_manager
+from app.core.cache import (
+    get_forecast_body_async,
+    set_forecast_body_async,
+    set_forecast_vector_async,
+    get_forecast_vectors_async,
+    set_forecast_vectors_async,
+    get_scenario_tables_async,
+    set_scenario_tables_async,
+    is_expired,
+    should_refresh_early,
+    acquire_lock_async,
+    release_lock_async,
+    wait_for_forecast_vector_async,
+)
+from app.core.single_flight import SingleFlight
+from app.services.registry import registry_snapshot
+from app.services.catalog import series_catalog
+from app.core.executors import run_cpu, run_io
+from app.core.metrics import timed, count_cache
+from app.core.serialization import dumps_json, accepts_gzip
 
-if redis_url:
-    try:
-        redis_client = redis.from_url(redis_url, decode_responses=True)
-        redis_client.ping()
-        print("✅ Successfully connected to Redis.")
-    except redis.exceptions.ConnectionError as e:
-        print(f"⚠️ Could not connect to Redis: {e}. Caching will be disabled.")
-        redis_client = None
-else:
-    print("⚠️ REDIS_URL not set. Caching will be disabled.")
+# --- Router ---
+router = APIRouter()
 
 
 # --- API Endpoints ---
 
-@router.get("/materials", tags=["Forecasting"], response_model=list[str])
-def get_materials_endpoint():
-    materials = get_available_materials()
-    if not materials:
+def _etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+async def _catalog_response(request, body_name):
+    """
+    Serves one of the in-process catalog's pre-serialized bodies, with an ETag that
+    changes when an ingest does (304 on If-None-Match).
+    """
+    if not await series_catalog.ensure_loaded() or not series_catalog.entries:
         raise HTTPException(status_code=500, detail="Could not retrieve materials from database.")
-    return materials
+    headers = {"ETag": series_catalog.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), series_catalog.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=getattr(series_catalog, body_name), media_type="application/json", headers=headers)
+
+
+@router.get("/materials", tags=["Forecasting"], response_model=list[str])
+async def get_materials_endpoint(request: Request):
+    """Series ids in the catalog, served from memory (no query per call)."""
+    return await _catalog_response(request, "materials_body")
+
+
+@router.get("/materials/catalog", tags=["Forecasting"], response_model=list[SeriesCatalogItem])
+async def get_materials_catalog_endpoint(request: Request):
+    """Every series with its source, date range, row count and last update time."""
+    return await _catalog_response(request, "catalog_body")
+
+
+MAX_HISTORY_PAGE = 10000
 
 
 @router.get("/historical-data/{material_id}", tags=["Forecasting"])
-def get_historical_data_endpoint(material_id: str):
-    """Endpoint to fetch historical data for a given material."""
-    data = get_historical_data(series_id=material_id)
-    if not data:
+async def get_historical_data_endpoint(
+    request: Request,
+    material_id: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_HISTORY_PAGE),
+    cursor: Optional[str] = None,
+    format: Literal["rows", "columnar", "arrow"] = "rows",
+):
+    """
+    Endpoint to fetch historical data for a given material.
+
+    - `start`/`end` filter by date and `limit` + `cursor` page through the result
+      (the next cursor is returned in the `X-Next-Cursor` header); all of it runs in SQL.
+    - `format=rows` (default) returns [{date, value}, ...], `columnar` returns parallel
+      `dates`/`values` arrays and `arrow` returns an Arrow IPC stream (requires pyarrow).
+    - Responses carry an ETag derived from the series' stored contents, so unchanged
+      data is answered with 304 when the client sends If-None-Match.
+    """
+    after = None
+    if cursor:
+        try:
+            after = datetime.fromisoformat(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    # 1. Cheap fingerprint first: answers 404 and 304 without reading the rows
+    marker = await get_series_marker_async(material_id)
+    if marker is None:
+        raise HTTPException(status_code=503, detail="Historical data is temporarily unavailable.")
+    if not marker:
         raise HTTPException(status_code=404, detail=f"No historical data found for {material_id}")
-    return data
 
+    fingerprint = f"{material_id}|{marker}|{start}|{end}|{limit}|{cursor}|{format}"
+    etag = f'"{hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
 
-@router.get("/forecast", tags=["Forecasting"], response_model=ForecastResponse)
-def get_forecast_endpoint(material_id: str, horizon: int = 12):
-    
-    # Initialize Artifact Manager early to track storage source
-    artifact_manager = ArtifactManager()
-    print(f"📦 Using storage mode: {artifact_manager.mode}")
-    
-    # 1. Redis Caching Strategy
-    cache_key = f"forecast:{material_id}:{horizon}"
-    if redis_client:
+    # 2. Filtered page straight from SQL (one extra row tells us whether there is more)
+    rows = await get_historical_page_async(
+        material_id,
+        start=datetime.combine(start, day_start.min) if start else None,
+        end=datetime.combine(end, day_start.min) if end else None,
+        after=after,
+        limit=limit + 1 if limit else None
+    )
+    if rows is None:
+        raise HTTPException(status_code=503, detail="Historical data is temporarily unavailable.")
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].day
+        headers["X-Next-Cursor"] = next_cursor
+
+    # 3. Serialize in the requested layout
+    if format == "arrow":
         try:
-            cached_forecast = redis_client.get(cache_key)
-            if cached_forecast:
-                print(f"⚡ Cache HIT for {material_id}")
-                return ForecastResponse(
-                    material_id=material_id,
-                    forecast=json.loads(cached_forecast),
-                    source="cache",
-                    storage_mode=artifact_manager.mode
-                )
-        except Exception as e:
-            print(f"⚠️ Redis cache error: {e}")
+            import pyarrow as pa
+        except ImportError:
+            raise HTTPException(status_code=406, detail="Arrow format is not available on this server.")
+        table = pa.table({
+            "date": pa.array([row.date for row in rows], type=pa.timestamp("s")),
+            "value": pa.array([row.value for row in rows], type=pa.float64()),
+        })
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return Response(content=sink.getvalue().to_pybytes(), media_type="application/vnd.apache.arrow.stream", headers=headers)
+
+    if format == "columnar":
+        return JSONResponse({
+            "material_id": material_id,
+            "dates": [row.day for row in rows],
+            "values": [row.value for row in rows],
+            "next_cursor": next_cursor,
+        }, headers=headers)
 
+    return JSONResponse([{"date": row.day, "value": row.value} for row in rows], headers=headers)
+
+
+# In-process coalescing of concurrent recomputes of the same vector
+forecast_flights = SingleFlight()
+
+
+async def _compute_forecast_vector(material_id, steps, artifact_manager):
+    """
+    Builds a vector of at least `steps` months from the production version in the
+    registry snapshot (or the latest model when there is none): the training-time
+    vector from the database if it is long enough, otherwise the model.
+    Returns (vector, source).
+    """
+    version = registry_snapshot.production_version(material_id)
+
+    # 1. Precomputed vector written to the database at training time
+    vector = await get_precomputed_forecast_async(material_id, version)
+    if vector and len(vector["values"]) >= steps:
+        return vector, "precomputed"
+
+    # 2. Fallback: no (long enough) precomputed vector, run the model
     print(f"⚙️ Generating forecast for '{material_id}'...")
-    
+
+    # 2a. Load Model from storage (LOCAL or S3)
     try:
-        # 2. Load Model from storage (LOCAL or S3)
-        try:
-            print(f"📥 Loading model from {artifact_manager.mode}...")
-            model = artifact_manager.load_model(material_id)
-            print(f"✅ Model loaded from {artifact_manager.mode}")
-        except Exception as e:
-            # If the manager fails to find/load the file, we return a 404
-            print(f"❌ Model not found for {material_id}: {e}")
-            raise HTTPException(
-                status_code=404, 
-                detail=f"Model for {material_id} not found. Please contact admin to retrain models."
-            )
-
-        # 3. Load Manifest (Metadata) from storage (LOCAL or S3)
-        # We need this to get the 'last_training_date' for the forecast service
-        try:
-            print(f"📥 Loading manifest from {artifact_manager.mode}...")
-            manifest = artifact_manager.load_manifest(material_id)
-            last_date = manifest.get("last_training_date")
-            if not last_date:
-                raise ValueError("Manifest missing 'last_training_date'")
-            print(f"✅ Manifest loaded from {artifact_manager.mode}")
-        except Exception as e:
-            print(f"❌ Manifest error for {material_id}: {e}")
-            raise HTTPException(
-                status_code=404, 
-                detail=f"Model metadata (manifest) for {material_id} is missing or invalid."
-            )
-
-        # 4. Generate Forecast
-        print(f"🔮 Generating {horizon}-month forecast...")
-        forecast_data = generate_forecast(model, last_date, horizon)
-        print(f"✅ Forecast generated successfully from {artifact_manager.mode}")
-
-        # 5. Cache & Return
-        if redis_client:
-            try:
-                redis_client.set(cache_key, json.dumps(forecast_data), ex=3600)
-                print(f"💾 Forecast cached in Redis")
-            except Exception as e:
-                print(f"⚠️ Redis caching failed (forecast still returned): {e}")
+        print(f"📥 Loading model from {artifact_manager.mode}...")
+        # Blocking storage I/O runs on the artifact pool, off the event loop
+        model = await run_io(artifact_manager.load_model, material_id, version)
+        print(f"✅ Model loaded from {artifact_manager.mode}")
+    except Exception as e:
+        # If the manager fails to find/load the file, we return a 404
+        print(f"❌ Model not found for {material_id}: {e}")
+        raise HTTPException(
+            status_code=404, 
+            detail=f"Model for {material_id} not found. Please contact admin to retrain models."
+        )
 
-        return ForecastResponse(
-            material_id=material_id,
-            forecast=forecast_data,
-            source="model",
-            storage_mode=artifact_manager.mode
+    # 2b. Load Manifest (Metadata) from storage (LOCAL or S3)
+    # We need this to get the 'last_training_date' for the forecast service
+    try:
+        print(f"📥 Loading manifest from {artifact_manager.mode}...")
+        manifest = await run_io(artifact_manager.load_manifest, material_id, version)
+        last_date = manifest.get("last_training_date")
+        if not last_date:
+            raise ValueError("Manifest missing 'last_training_date'")
+        print(f"✅ Manifest loaded from {artifact_manager.mode}")
+    except Exception as e:
+        print(f"❌ Manifest error for {material_id}: {e}")
+        raise HTTPException(
+            status_code=404, 
+            detail=f"Model metadata (manifest) for {material_id} is missing or invalid."
         )
 
+    # 2c. Generate the full vector once so later horizons become slices
+    print(f"🔮 Generating {steps}-month forecast vector...")
+    with timed("forecast"):
+        vector = await run_cpu(build_forecast_vector, model, last_date, steps, version=manifest.get("version"))
+    print(f"✅ Forecast generated successfully from {artifact_manager.mode}")
+    return vector, "model"
+
+
+async def _refresh_forecast_vector(material_id, steps, artifact_manager, wait=True):
+    """
+    Recomputes and republishes a vector under a short Redis lock, so only one worker
+    in the whole deployment does it. Other callers wait for that worker's result
+    (or, with wait=False, leave it to them and return None).
+    """
+    lock_name = f"forecast:{material_id}:{steps}"
+    token = await acquire_lock_async(lock_name)
+    if token is None:
+        if not wait:
+            return None
+        vector = await wait_for_forecast_vector_async(material_id, steps)
+        if vector:
+            return vector, "cache"
+        # The lock holder died or is too slow: compute it ourselves
+        print(f"⚠️ Timed out waiting for {lock_name}; recomputing locally")
+
+    try:
+        started = time.perf_counter()
+        vector, source = await _compute_forecast_vector(material_id, steps, artifact_manager)
+        await set_forecast_vector_async(material_id, vector, delta=time.perf_counter() - started)
+        return vector, source
+    finally:
+        if token:
+            await release_lock_async(lock_name, token)
+
+
+def _forecast_body_response(body, gzipped, request):
+    """Raw JSON response; gzipped bodies go out as-is to clients that accept gzip."""
+    headers = {"Vary": "Accept-Encoding"} if gzipped else None
+    if gzipped:
+        if accepts_gzip(request.headers.get("accept-encoding")):
+            headers["Content-Encoding"] = "gzip"
+        else:
+            body = gzip.decompress(body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _start_refresh_if_due(entry, material_id, steps, artifact_manager, cache="redis"):
+    """
+    Stale, or volunteered for early refresh: the caller serves the value it has and a
+    single background task (per process, and per deployment via the lock) refreshes it.
+    Returns True if a refresh was started.
+    """
+    if is_expired(entry) or should_refresh_early(entry):
+        count_cache(cache, "stale" if is_expired(entry) else "early_refresh")
+        forecast_flights.start(f"{material_id}:{steps}", _refresh_forecast_vector, material_id, steps, artifact_manager, wait=False)
+        return True
+    count_cache(cache, "hit")
+    return False
+
+
+@router.get("/forecast", tags=["Forecasting"], response_model=ForecastResponse)
+async def get_forecast_endpoint(request: Request, material_id: str, horizon: int = Query(12, ge=1, le=MAX_REQUEST_HORIZON)):
+    
+    # Shared Artifact Manager (models/manifests are cached process-wide)
+    artifact_manager = get_artifact_manager()
+    steps = max(horizon, MAX_FORECAST_HORIZON)
+    flight_key = f"{material_id}:{steps}"
+    
+    try:
+        # 1. Finished response body of the current version and this horizon, returned
+        #    byte-for-byte: no JSON parsing, validation or re-serialization on a hit.
+        #    The same round trip returns the version's vector when there is no body yet.
+        body, gzipped, entry = await get_forecast_body_async(material_id, horizon)
+        if body is not None:
+            _start_refresh_if_due(entry, material_id, steps, artifact_manager, cache="redis_body")
+            return _forecast_body_response(body, gzipped, request)
+
+        count_cache("redis_body", "miss")
+        print(f"📦 Using storage mode: {artifact_manager.mode}")
+
+        # 2. Precomputed vector from Redis (one key per material, any horizon)
+        if entry and horizon <= len(entry["vector"]["values"]):
+            refreshing = _start_refresh_if_due(entry, material_id, steps, artifact_manager)
+            vector, source = entry["vector"], "cache"
+        else:
+            # 3. Hard miss: concurrent requests in this process share one recompute
+            count_cache("redis", "miss")
+            vector, source = await forecast_flights.do(flight_key, _refresh_forecast_vector, material_id, steps, artifact_manager)
+            entry, refreshing = None, False
+
+        print(f"⚡ Serving {horizon}-month forecast for {material_id} from {source}")
+        response = {
+            "material_id": material_id,
+            "forecast": slice_forecast_vector(vector, horizon),
+            "source": source,
+            "storage_mode": artifact_manager.mode,
+        }
+        body = dumps_json(response)
+
+        # 4. Cache the body later hits will get (source "cache"), unless it is stale and
+        #    about to be rebuilt by the refresh
+        if not refreshing:
+            cached_body = body if source == "cache" else dumps_json({**response, "source": "cache"})
+            await set_forecast_body_async(material_id, vector.get("version"), horizon, cached_body, entry)
+        return Response(content=body, media_type="application/json")
+
     except HTTPException as he:
         raise he
     except Exception as e:
         print(traceback.format_exc())
-        raise HTTPException(status_code=500, detail=f"Model prediction error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Model prediction error: {str(e)}")
+
+
+def _load_model_and_manifest(artifact_manager, material_id):
+    """Blocking load of a material's production (else latest) model and manifest (run on the artifact pool)."""
+    version = registry_snapshot.production_version(material_id)
+    model = artifact_manager.load_model(material_id, version)
+    manifest = artifact_manager.load_manifest(material_id, version)
+    if not manifest.get("last_training_date"):
+        raise ValueError("Manifest missing 'last_training_date'")
+    return model, manifest
+
+
+@router.post("/forecast/batch", tags=["Forecasting"], response_model=BatchForecastResponse)
+async def get_batch_forecast_endpoint(request: BatchForecastRequest):
+    """
+    Resolves many (material_id, horizon) pairs in one call: one Redis MGET, one DB
+    query for precomputed vectors, concurrent model loads for the rest, one batched
+    forecast pass and one pipelined Redis write-back. Errors are reported per item.
+    """
+    artifact_manager = get_artifact_manager()
+
+    # Longest horizon requested per material: one vector serves every item for it
+    needed = {}
+    for item in request.items:
+        needed[item.material_id] = max(needed.get(item.material_id, 0), item.horizon)
+    materials = list(needed)
+
+    def still_missing():
+        return [m for m in materials if m not in vectors or len(vectors[m]["values"]) < needed[m]]
+
+    # 1. Cached current-version vectors for every material in a single round trip
+    vectors = await get_forecast_vectors_async(materials)
+    sources = {m: "cache" for m in vectors}
+    for m in materials:
+        count_cache("redis", "hit" if m in vectors and len(vectors[m]["values"]) >= needed[m] else "miss")
+    to_cache, errors = {}, {}
+
+    # 2. Precomputed vectors for the misses in a single query
+    missing = still_missing()
+    precomputed = await get_precomputed_forecasts_async(missing, {m: registry_snapshot.production_version(m) for m in missing})
+    for m, vector in precomputed.items():
+        vectors[m], sources[m], to_cache[m] = vector, "precomputed", vector
+
+    # 3. Remaining misses: load models concurrently, then forecast them together
+    missing = still_missing()
+    if missing:
+        print(f"⚙️ Batch: generating forecasts for {missing}")
+        loaded = await asyncio.gather(
+            *(run_io(_load_model_and_manifest, artifact_manager, m) for m in missing),
+            return_exceptions=True
+        )
+        ready = []
+        for m, outcome in zip(missing, loaded):
+            if isinstance(outcome, Exception):
+                print(f"❌ Model/manifest error for {m}: {outcome}")
+                errors[m] = f"Model for {m} not found or its manifest is invalid."
+            else:
+                ready.append((m, *outcome))
+
+        if ready:
+            steps = max(MAX_FORECAST_HORIZON, *(needed[m] for m, _, _ in ready))
+            try:
+                with timed("forecast"):
+                    built = await run_cpu(
+                        build_forecast_vectors,
+                        [model for _, model, _ in ready],
+                        [manifest["last_training_date"] for _, _, manifest in ready],
+                        steps,
+                        [manifest.get("version") for _, _, manifest in ready]
+                    )
+                for (m, _, _), vector in zip(ready, built):
+                    vectors[m], sources[m], to_cache[m] = vector, "model", vector
+            except Exception as e:
+                print(traceback.format_exc())
+                for m, _, _ in ready:
+                    errors[m] = f"Model prediction error: {str(e)}"
+
+    # 4. Write back everything newly resolved in one pipelined round trip
+    await set_forecast_vectors_async(to_cache)
+
+    results = []
+    for item in request.items:
+        m = item.material_id
+        if m in errors:
+            results.append(BatchForecastResult(material_id=m, horizon=item.horizon, error=errors[m]))
+        else:
+            results.append(BatchForecastResult(
+                material_id=m,
+                horizon=item.horizon,
+                forecast=slice_forecast_vector(vectors[m], item.horizon),
+                source=sources[m]
+            ))
+
+    return BatchForecastResponse(results=results, storage_mode=artifact_manager.mode)
+
+
+MAX_SCENARIO_MATERIALS = 100
+
+
+@router.get("/forecast/scenarios", tags=["Forecasting"], response_model=ScenarioResponse)
+async def get_forecast_scenarios_endpoint(
+    material_id: List[str] = Query(..., max_length=MAX_SCENARIO_MATERIALS),
+    horizon: int = Query(12, ge=1, le=SCENARIO_MAX_HORIZON),
+    paths: int = Query(SCENARIO_PATHS, ge=100, le=SCENARIO_MAX_PATHS),
+    quantiles: List[float] = Query(list(DEFAULT_SCENARIO_QUANTILES), max_length=20),
+):
+    """
+    Price-risk bands: simulates `paths` future paths per material (repeat `material_id`
+    for several) and returns the requested `quantiles` for every month. All uncached
+    materials are simulated together in one batched pass; the quantile tables are
+    cached in Redis next to the point-forecast vector of the same model version.
+    """
+    if any(not 0 < q < 1 for q in quantiles):
+        raise HTTPException(status_code=422, detail="Quantiles must be between 0 and 1.")
+    artifact_manager = get_artifact_manager()
+    quantiles = sorted(set(quantiles))
+    labels = [quantile_label(q) for q in quantiles]
+    materials = list(dict.fromkeys(material_id))
+    steps = max(horizon, MAX_FORECAST_HORIZON)
+
+    # 1. Cached tables of each material's current version in a single round trip
+    tables = await get_scenario_tables_async(materials, paths, labels)
+    tables = {m: table for m, table in tables.items() if len(table["values"][0]) >= horizon}
+    sources = {m: "cache" for m in tables}
+    for m in materials:
+        count_cache("redis_scenarios", "hit" if m in tables else "miss")
+
+    # 2. Misses: load models concurrently, then simulate them all in one pass
+    errors = {}
+    missing = [m for m in materials if m not in tables]
+    if missing:
+        loaded = await asyncio.gather(
+            *(run_io(_load_model_and_manifest, artifact_manager, m) for m in missing),
+            return_exceptions=True
+        )
+        ready = []
+        for m, outcome in zip(missing, loaded):
+            if isinstance(outcome, Exception):
+                print(f"❌ Model/manifest error for {m}: {outcome}")
+                errors[m] = f"Model for {m} not found or its manifest is invalid."
+            else:
+                ready.append((m, *outcome))
+
+        if ready:
+            print(f"🎲 Simulating {paths} paths x {steps} months for {[m for m, _, _ in ready]}")
+            try:
+                with timed("simulate"):
+                    built = await run_cpu(
+                        build_scenario_tables,
+                        [model for _, model, _ in ready],
+                        [manifest["last_training_date"] for _, _, manifest in ready],
+                        steps,
+                        [manifest.get("version") for _, _, manifest in ready],
+                        paths,
+                        quantiles
+                    )
+                simulated = {m: table for (m, _, _), table in zip(ready, built)}
+                tables.update(simulated)
+                sources.update({m: "simulation" for m in simulated})
+                # 3. Write back in one pipelined round trip
+                await set_scenario_tables_async(simulated, paths, labels)
+            except Exception as e:
+                print(traceback.format_exc())
+                for m, _, _ in ready:
+                    errors[m] = f"Simulation error: {str(e)}"
+
+    results = []
+    for m in materials:
+        if m in errors:
+            results.append(ScenarioResult(material_id=m, error=errors[m]))
+        else:
+            results.append(ScenarioResult(material_id=m, forecast=slice_scenario_table(tables[m], horizon), source=sources[m]))
+
+    return ScenarioResponse(
+        horizon=horizon,
+        paths=paths,
+        quantiles=quantiles,
+        results=results,
+        storage_mode=artifact_manager.mode
+    )
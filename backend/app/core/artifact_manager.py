@@ -3,8 +3,14 @@ import boto3
 import joblib
 import json
 import logging
+from functools import lru_cache
 from io import BytesIO
 from botocore.exceptions import ClientError
+from app.core import model_artifact
+from app.core.model_artifact import CompactStateSpaceModel
+from app.core.model_cache import model_cache
+from app.core.disk_cache import disk_cache
+from app.core.metrics import timed, count_cache, count_artifact_bytes
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -28,30 +34,36 @@ class ArtifactManager:
                 raise
 
     def save_model(self, series_id, model_object, manifest_dict):
+        """
+        Publishes a single compact artifact holding the forecast-only model with the
+        manifest embedded as its header: an immutable copy under the version's own key
+        (models/{series_id}/{version}.mfa, what the registry's production version
+        resolves to) and the series' latest artifact (models/{series_id}.mfa).
+        """
         try:
-            if self.mode == "LOCAL":
-                # Save to ml/models/ folder
-                joblib.dump(model_object, f"ml/models/{series_id}.pkl")
-                with open(f"ml/models/{series_id}.json", "w") as f:
-                    json.dump(manifest_dict, f)
-            elif self.mode == "S3":
-                # Serialize model to memory buffer
-                model_buffer = BytesIO()
-                joblib.dump(model_object, model_buffer)
-                model_buffer.seek(0)
-                # Upload model to S3
-                self.s3_client.upload_fileobj(
-                    model_buffer,
-                    Bucket=self.bucket_name,
-                    Key=f"models/{series_id}.pkl"
-                )
-                # Serialize and upload manifest
-                manifest_buffer = BytesIO(json.dumps(manifest_dict).encode('utf-8'))
-                self.s3_client.upload_fileobj(
-                    manifest_buffer,
-                    Bucket=self.bucket_name,
-                    Key=f"models/{series_id}.json"
-                )
+            if not isinstance(model_object, CompactStateSpaceModel):
+                model_object = CompactStateSpaceModel.from_results(model_object)
+            blob = model_artifact.dump_artifact(model_object, manifest_dict)
+
+            filenames = [f"{series_id}.{model_artifact.ARTIFACT_EXTENSION}"]
+            if manifest_dict.get("version"):
+                filenames.insert(0, self._versioned_filename(series_id, manifest_dict["version"]))
+            for filename in filenames:
+                if self.mode == "LOCAL":
+                    # Write next to the target and rename so readers never see a partial file
+                    os.makedirs(os.path.dirname(f"ml/models/{filename}"), exist_ok=True)
+                    tmp_path = f"ml/models/{filename}.tmp"
+                    with open(tmp_path, "wb") as f:
+                        f.write(blob)
+                    os.replace(tmp_path, f"ml/models/{filename}")
+                elif self.mode == "S3":
+                    self.s3_client.put_object(
+                        Body=blob,
+                        Bucket=self.bucket_name,
+                        Key=f"models/{filename}"
+                    )
+            # A new version was published: drop any stale in-process copy
+            self.invalidate(series_id)
         except ClientError as e:
             logger.error(f"S3 upload failed for {series_id}: {e}")
             raise
@@ -62,20 +74,14 @@ class ArtifactManager:
             logger.error(f"Unexpected error saving model {series_id}: {e}")
             raise
 
-    def load_model(self, series_id):
+    def load_model(self, series_id, version=None):
+        """The series' model: `version` (e.g. the registry's production version) or the latest."""
         try:
-            if self.mode == "LOCAL":
-                return joblib.load(f"ml/models/{series_id}.pkl")
-            elif self.mode == "S3":
-                # Download model to memory buffer
-                buffer = BytesIO()
-                self.s3_client.download_fileobj(
-                    Bucket=self.bucket_name,
-                    Key=f"models/{series_id}.pkl",
-                    Fileobj=buffer
-                )
-                buffer.seek(0)
-                return joblib.load(buffer)
+            compact = self._load_compact(series_id, version)
+            if compact is not None:
+                return compact[0]
+            # Legacy pickled SARIMAXResults written before the compact format
+            return self._load_cached("model", series_id, f"{series_id}.pkl", lambda raw: joblib.load(BytesIO(raw)))
         except ClientError as e:
             logger.error(f"S3 download failed for {series_id}: {e}")
             raise
@@ -86,23 +92,120 @@ class ArtifactManager:
             logger.error(f"Unexpected error loading model {series_id}: {e}")
             raise
     
-    def load_manifest(self, series_id):
-        """Retrieves the manifest JSON (metadata) for a model."""
+    def load_manifest(self, series_id, version=None):
+        """Retrieves the manifest JSON (metadata) for a model (`version` or the latest)."""
         try:
-            if self.mode == "LOCAL":
-                # Match the naming convention used in save_model ({series_id}.json)
-                path = f"ml/models/{series_id}.json"
-                with open(path, 'r') as f:
-                    return json.load(f)
-            elif self.mode == "S3":
-                buffer = BytesIO()
-                self.s3_client.download_fileobj(
-                    Bucket=self.bucket_name,
-                    Key=f"models/{series_id}.json",
-                    Fileobj=buffer
-                )
-                buffer.seek(0)
-                return json.loads(buffer.read().decode('utf-8'))
+            with timed("manifest_load"):
+                compact = self._load_compact(series_id, version)
+                if compact is not None:
+                    return compact[1]
+                # Legacy sidecar manifest ({series_id}.json)
+                return self._load_cached("manifest", series_id, f"{series_id}.json", lambda raw: json.loads(raw.decode('utf-8')))
         except Exception as e:
             logger.error(f"Error loading manifest {series_id}: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    def list_series(self):
+        """Returns the series ids that have a model artifact in storage (compact or legacy)."""
+        extensions = (f".{model_artifact.ARTIFACT_EXTENSION}", ".pkl")
+        if self.mode == "LOCAL":
+            names = os.listdir("ml/models") if os.path.isdir("ml/models") else []
+        elif self.mode == "S3":
+            names = []
+            paginator = self.s3_client.get_paginator("list_objects_v2")
+            for page in paginator.paginate(Bucket=self.bucket_name, Prefix="models/"):
+                names.extend(obj["Key"][len("models/"):] for obj in page.get("Contents", []))
+        else:
+            raise ValueError(f"Unknown ARTIFACT_STORAGE_MODE: {self.mode}")
+        # Versioned copies (models/{series_id}/{version}.mfa) don't add series
+        return sorted({os.path.splitext(name)[0] for name in names if name.endswith(extensions) and "/" not in name})
+
+    def invalidate(self, series_id):
+        """Drops the in-process cached model and manifest for a series."""
+        model_cache.invalidate(series_id)
+
+    # --- Internal helpers ---
+
+    def _versioned_filename(self, series_id, version):
+        return f"{series_id}/{version}.{model_artifact.ARTIFACT_EXTENSION}"
+
+    def _load_compact(self, series_id, version=None):
+        """Returns (model, manifest) from the compact artifact (one read), or None if there is none."""
+        if version is not None:
+            # Versioned artifacts never change: cached copies are used without revalidation
+            try:
+                return self._load_cached(f"artifact:{version}", series_id, self._versioned_filename(series_id, version),
+                                         model_artifact.load_artifact, immutable=True)
+            except (FileNotFoundError, ClientError) as e:
+                if isinstance(e, ClientError) and e.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404", "NotFound"):
+                    raise
+                # Registered before artifacts were versioned
+                logger.warning(f"No artifact for {series_id} v{version}; using the latest artifact")
+        try:
+            return self._load_cached("artifact", series_id, f"{series_id}.{model_artifact.ARTIFACT_EXTENSION}", model_artifact.load_artifact)
+        except (FileNotFoundError, ClientError) as e:
+            if isinstance(e, ClientError) and e.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404", "NotFound"):
+                raise
+            return None
+
+    def _load_cached(self, kind, series_id, filename, deserialize, immutable=False):
+        """
+        Returns a deserialized artifact from the process-wide cache when its version
+        (S3 ETag / local mtime+size) still matches storage, otherwise downloads it.
+        Within the revalidation window, or for `immutable` artifacts, the version
+        check itself is skipped.
+        """
+        entry = model_cache.get(kind, series_id)
+        if entry is not None:
+            if immutable or model_cache.is_fresh(entry):
+                count_cache("model", "hit")
+                return entry.value
+            if self._artifact_version(filename) == entry.version:
+                model_cache.mark_validated(entry)
+                count_cache("model", "revalidated")
+                return entry.value
+        count_cache("model", "miss")
+
+        with timed("artifact_download"):
+            raw, version = self._read_artifact(filename)
+        with timed("deserialize"):
+            value = deserialize(raw)
+        model_cache.put(kind, series_id, version, value, len(raw))
+        return value
+
+    def _artifact_version(self, filename):
+        if self.mode == "LOCAL":
+            stat = os.stat(f"ml/models/{filename}")
+            return f"{stat.st_mtime_ns}-{stat.st_size}"
+        elif self.mode == "S3":
+            head = self.s3_client.head_object(Bucket=self.bucket_name, Key=f"models/{filename}")
+            return head["ETag"]
+
+    def _read_artifact(self, filename):
+        """Returns (raw_bytes, version) read in a single request."""
+        if self.mode == "LOCAL":
+            with open(f"ml/models/{filename}", "rb") as f:
+                stat = os.fstat(f.fileno())
+                raw = f.read()
+            count_artifact_bytes(self.mode, len(raw))
+            return raw, f"{stat.st_mtime_ns}-{stat.st_size}"
+        elif self.mode == "S3":
+            if disk_cache is not None:
+                # Host-wide copy, revalidated with If-None-Match (a 304 instead of a download)
+                raw, etag, downloaded = disk_cache.fetch(self.s3_client, self.bucket_name, f"models/{filename}")
+                count_cache("disk", "miss" if downloaded else "hit")
+                if downloaded:
+                    count_artifact_bytes(self.mode, len(raw))
+                return raw, etag
+            # get_object returns the ETag of exactly the bytes we read
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=f"models/{filename}")
+            raw = response["Body"].read()
+            count_artifact_bytes(self.mode, len(raw))
+            return raw, response["ETag"]
+        raise ValueError(f"Unknown ARTIFACT_STORAGE_MODE: {self.mode}")
+
+
+@lru_cache(maxsize=None)
+def get_artifact_manager():
+    """Returns the process-wide ArtifactManager (and its S3 client)."""
+    return ArtifactManager()
@@ -0,0 +1,409 @@
+import os
+import json
+import math
+import time
+import uuid
+import random
+import struct
+import asyncio
+import redis
+import redis.asyncio
+from app.core.metrics import timed
+from app.core.serialization import gzip_body
+
+# --- Redis Connection (shared by the API and the training pipeline) ---
+redis_url = os.getenv("REDISCLOUD_URL") or os.getenv("REDIS_URL") or "redis://redis:6379/0"
+redis_client = None
+
+if redis_url:
+    try:
+        redis_client = redis.from_url(redis_url, decode_responses=True)
+        redis_client.ping()
+        print("✅ Successfully connected to Redis.")
+    except redis.exceptions.ConnectionError as e:
+        print(f"⚠️ Could not connect to Redis: {e}. Caching will be disabled.")
+        redis_client = None
+else:
+    print("⚠️ REDIS_URL not set. Caching will be disabled.")
+
+# Async client for the API request path; only created when the sync ping succeeded
+async_redis_client = redis.asyncio.from_url(redis_url, decode_responses=True) if redis_client else None
+# Raw-bytes client for pre-serialized (possibly gzipped) response bodies
+async_redis_bytes_client = redis.asyncio.from_url(redis_url) if redis_client else None
+
+# Vectors are keyed by model version and a retrain moves the per-series version
+# pointer, so a cached vector never goes out of date; the TTL only bounds memory.
+FORECAST_VECTOR_TTL = int(os.getenv("FORECAST_VECTOR_TTL", str(7 * 24 * 3600)))
+# After the TTL a vector stays in Redis this much longer and is served stale while
+# a single worker refreshes it.
+FORECAST_STALE_TTL = int(os.getenv("FORECAST_STALE_TTL", "3600"))
+# XFetch beta: > 1 favours earlier refreshes, < 1 later ones
+FORECAST_EARLY_REFRESH_BETA = float(os.getenv("FORECAST_EARLY_REFRESH_BETA", "1.0"))
+# Recompute lock; long enough for a cold S3 load + forecast
+FORECAST_LOCK_TTL_MS = int(os.getenv("FORECAST_LOCK_TTL_MS", "10000"))
+# Cached /forecast bodies at least this large are stored gzipped (0 disables)
+FORECAST_BODY_GZIP_BYTES = int(os.getenv("FORECAST_BODY_GZIP_BYTES", "1024"))
+
+# Deletes the lock only if we still own it
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Resolves each series' current-version pointer and reads that version's vector in
+# one round trip. ARGV[i] is the vector key prefix for KEYS[i]. (Touches keys not
+# listed in KEYS, so this assumes a single Redis instance rather than a cluster.)
+_READ_CURRENT_SCRIPT = """
+local out = {}
+for i, pointer in ipairs(KEYS) do
+    local version = redis.call('get', pointer)
+    out[i] = version and redis.call('get', ARGV[i] .. ':' .. version) or false
+end
+return out
+"""
+
+# Same pointer resolution for one series' pre-serialized body, falling back to the
+# vector when that horizon has no body yet: ARGV = {body prefix, horizon, vector prefix}
+_READ_CURRENT_BODY_SCRIPT = """
+local version = redis.call('get', KEYS[1])
+if not version then
+    return {false, false}
+end
+local body = redis.call('hget', ARGV[1] .. ':' .. version, ARGV[2])
+if body then
+    return {body, false}
+end
+return {false, redis.call('get', ARGV[3] .. ':' .. version)}
+"""
+
+# Cached body header: expires_at, delta (as in _wrap) and whether the body is gzipped
+_BODY_HEADER = struct.Struct("<dd?")
+
+
+def forecast_vector_key(series_id, version=None):
+    """Vectors are immutable per model version: forecast:{series_id}:{version}."""
+    return f"forecast:{series_id}:{_version_tag(version)}"
+
+
+def forecast_body_key(series_id, version=None):
+    """
+    Finished /forecast response bodies of one vector version, a hash with one field per
+    horizon: forecast-body:{series_id}:{version}. Rewriting the vector deletes it.
+    """
+    return f"forecast-body:{series_id}:{_version_tag(version)}"
+
+
+def forecast_version_key(series_id):
+    """Pointer to the version of a series that serving should read."""
+    return f"forecast-version:{series_id}"
+
+
+def scenario_key_prefix(series_id, paths, quantiles):
+    """Scenario tables are versioned like vectors: forecast-scenarios:{series_id}:{paths}:{quantiles}:{version}."""
+    return f"forecast-scenarios:{series_id}:{paths}:{','.join(quantiles)}"
+
+
+def _version_tag(version):
+    # Legacy manifests may have no version
+    return version or "unversioned"
+
+
+def _read_current_args(series_ids):
+    return (
+        len(series_ids),
+        *[forecast_version_key(series_id) for series_id in series_ids],
+        *[f"forecast:{series_id}" for series_id in series_ids],
+    )
+
+
+def _queue_vector_writes(pipe, series_id, vector, delta=0.0, force_pointer=False, move_pointer=True):
+    """
+    Writes a vector under its version key, then points the series at it. Training
+    (force_pointer=True) always moves the pointer; the API only sets it when missing,
+    so a recompute racing a retrain can never move it back to an older version.
+    With move_pointer=False the pointer is left alone (a version that isn't in production).
+    """
+    ttl = FORECAST_VECTOR_TTL + FORECAST_STALE_TTL
+    pipe.set(forecast_vector_key(series_id, vector.get("version")), _wrap(vector, delta), ex=ttl)
+    # Bodies rendered from the previous write carry its expiry; rebuild them from this one
+    pipe.delete(forecast_body_key(series_id, vector.get("version")))
+    if move_pointer:
+        pipe.set(forecast_version_key(series_id), _version_tag(vector.get("version")), ex=ttl, nx=not force_pointer)
+
+
+def _wrap(vector, delta=0.0):
+    """Stores the vector with its logical expiry and how long it took to compute (XFetch)."""
+    return json.dumps({"vector": vector, "expires_at": time.time() + FORECAST_VECTOR_TTL, "delta": delta})
+
+
+def _unwrap(raw):
+    """Returns {"vector", "expires_at", "delta"}; bare vectors from older writers count as expired."""
+    entry = json.loads(raw)
+    if "vector" not in entry:
+        return {"vector": entry, "expires_at": 0.0, "delta": 0.0}
+    return entry
+
+
+def is_expired(entry):
+    return time.time() >= entry["expires_at"]
+
+
+def should_refresh_early(entry, beta=FORECAST_EARLY_REFRESH_BETA):
+    """
+    Probabilistic early expiration (XFetch): the closer to expiry and the more
+    expensive the last recompute, the likelier a request volunteers to refresh.
+    """
+    return time.time() - entry["delta"] * beta * math.log(1.0 - random.random()) >= entry["expires_at"]
+
+
+def get_forecast_vector(series_id):
+    """Returns the cached max-horizon forecast vector for a series, or None."""
+    if not redis_client:
+        return None
+    try:
+        cached = redis_client.eval(_READ_CURRENT_SCRIPT, *_read_current_args([series_id]))[0]
+        return _unwrap(cached)["vector"] if cached else None
+    except Exception as e:
+        print(f"⚠️ Redis cache error: {e}")
+        return None
+
+
+def set_forecast_vector(series_id, vector, delta=0.0):
+    """Caches a forecast vector ({version, start_date, values}). Failures are non-fatal."""
+    if not redis_client:
+        return
+    try:
+        with redis_client.pipeline(transaction=False) as pipe:
+            _queue_vector_writes(pipe, series_id, vector, delta)
+            pipe.execute()
+    except Exception as e:
+        print(f"⚠️ Redis caching failed: {e}")
+
+
+def publish_forecast_vector(series_id, vector, move_pointer=True):
+    """
+    Post-training hook: pre-warms the new version's key and then moves the series'
+    version pointer to it in one MULTI, so readers switch from the old vector to the
+    new one without ever seeing a miss. With move_pointer=False (a version that isn't
+    promoted to production) only the key is warmed. Returns True if Redis accepted it.
+    """
+    if not redis_client:
+        return False
+    try:
+        with redis_client.pipeline(transaction=True) as pipe:
+            _queue_vector_writes(pipe, series_id, vector, force_pointer=True, move_pointer=move_pointer)
+            # Drop the pre-versioning key (forecast:{series_id})
+            pipe.delete(f"forecast:{series_id}")
+            pipe.execute()
+        return True
+    except Exception as e:
+        print(f"⚠️ Redis publish failed: {e}")
+        return False
+
+
+async def get_forecast_entry_async(series_id):
+    """Returns the cached entry ({vector, expires_at, delta}), possibly stale, or None."""
+    if not async_redis_client:
+        return None
+    try:
+        with timed("redis_lookup"):
+            cached = (await async_redis_client.eval(_READ_CURRENT_SCRIPT, *_read_current_args([series_id])))[0]
+        return _unwrap(cached) if cached else None
+    except Exception as e:
+        print(f"⚠️ Redis cache error: {e}")
+        return None
+
+
+async def get_forecast_body_async(series_id, horizon):
+    """
+    One round trip for the /forecast hit path. Returns (body, gzipped, entry):
+    - the cached response body of the series' current version for this horizon (never
+      parsed), with entry = its {expires_at, delta}; or
+    - body None and entry = the current vector's entry as get_forecast_entry_async
+      returns it (None if not cached either).
+    """
+    if not async_redis_bytes_client:
+        return None, False, None
+    try:
+        with timed("redis_lookup"):
+            body, vector = await async_redis_bytes_client.eval(
+                _READ_CURRENT_BODY_SCRIPT, 1, forecast_version_key(series_id),
+                f"forecast-body:{series_id}", horizon, f"forecast:{series_id}"
+            )
+    except Exception as e:
+        print(f"⚠️ Redis cache error: {e}")
+        return None, False, None
+    if not body:
+        return None, False, _unwrap(vector) if vector else None
+    expires_at, delta, gzipped = _BODY_HEADER.unpack_from(body)
+    return body[_BODY_HEADER.size:], gzipped, {"expires_at": expires_at, "delta": delta}
+
+
+async def set_forecast_body_async(series_id, version, horizon, body, entry=None):
+    """
+    Caches a finished /forecast body under its vector's version. `entry` is the cache
+    entry the body was rendered from (its expiry is kept), or None for a fresh vector.
+    """
+    if not async_redis_bytes_client:
+        return
+    expires_at = entry["expires_at"] if entry else time.time() + FORECAST_VECTOR_TTL
+    delta = entry["delta"] if entry else 0.0
+    gzipped = 0 < FORECAST_BODY_GZIP_BYTES <= len(body)
+    if gzipped:
+        body = gzip_body(body)
+    key = forecast_body_key(series_id, version)
+    try:
+        async with async_redis_bytes_client.pipeline(transaction=False) as pipe:
+            pipe.hset(key, horizon, _BODY_HEADER.pack(expires_at, delta, gzipped) + body)
+            # Live no longer than the vector it was rendered from
+            pipe.expire(key, max(1, int(expires_at - time.time()) + FORECAST_STALE_TTL))
+            await pipe.execute()
+    except Exception as e:
+        print(f"⚠️ Redis caching failed: {e}")
+
+
+async def get_forecast_vector_async(series_id):
+    """Async version of get_forecast_vector."""
+    entry = await get_forecast_entry_async(series_id)
+    return entry["vector"] if entry else None
+
+
+async def set_forecast_vector_async(series_id, vector, delta=0.0):
+    """Async version of set_forecast_vector."""
+    if not async_redis_client:
+        return
+    try:
+        async with async_redis_client.pipeline(transaction=False) as pipe:
+            _queue_vector_writes(pipe, series_id, vector, delta)
+            await pipe.execute()
+    except Exception as e:
+        print(f"⚠️ Redis caching failed: {e}")
+
+
+async def get_forecast_vectors_async(series_ids):
+    """Fetches the current vectors of several series in one round trip. Returns {series_id: vector}."""
+    if not async_redis_client or not series_ids:
+        return {}
+    try:
+        with timed("redis_lookup"):
+            cached = await async_redis_client.eval(_READ_CURRENT_SCRIPT, *_read_current_args(list(series_ids)))
+        return {series_id: _unwrap(raw)["vector"] for series_id, raw in zip(series_ids, cached) if raw}
+    except Exception as e:
+        print(f"⚠️ Redis cache error: {e}")
+        return {}
+
+
+async def set_forecast_vectors_async(vectors):
+    """Caches several forecast vectors ({series_id: vector}) in one pipelined round trip."""
+    if not async_redis_client or not vectors:
+        return
+    try:
+        async with async_redis_client.pipeline(transaction=False) as pipe:
+            for series_id, vector in vectors.items():
+                _queue_vector_writes(pipe, series_id, vector)
+            await pipe.execute()
+    except Exception as e:
+        print(f"⚠️ Redis caching failed: {e}")
+
+
+async def get_scenario_tables_async(series_ids, paths, quantiles):
+    """
+    Fetches the scenario tables (`paths` paths, `quantiles` labels) of the current
+    version of several series in one round trip. Returns {series_id: table}.
+    """
+    if not async_redis_client or not series_ids:
+        return {}
+    try:
+        with timed("redis_lookup"):
+            cached = await async_redis_client.eval(
+                _READ_CURRENT_SCRIPT,
+                len(series_ids),
+                *[forecast_version_key(series_id) for series_id in series_ids],
+                *[scenario_key_prefix(series_id, paths, quantiles) for series_id in series_ids],
+            )
+        return {series_id: json.loads(raw) for series_id, raw in zip(series_ids, cached) if raw}
+    except Exception as e:
+        print(f"⚠️ Redis cache error: {e}")
+        return {}
+
+
+async def set_scenario_tables_async(tables, paths, quantiles):
+    """
+    Caches scenario tables ({series_id: table}) next to their version's forecast
+    vector, with the same TTL; the version pointer is only set when missing.
+    """
+    if not async_redis_client or not tables:
+        return
+    ttl = FORECAST_VECTOR_TTL + FORECAST_STALE_TTL
+    try:
+        async with async_redis_client.pipeline(transaction=False) as pipe:
+            for series_id, table in tables.items():
+                version = _version_tag(table.get("version"))
+                pipe.set(f"{scenario_key_prefix(series_id, paths, quantiles)}:{version}", json.dumps(table), ex=ttl)
+                pipe.set(forecast_version_key(series_id), version, ex=ttl, nx=True)
+            await pipe.execute()
+    except Exception as e:
+        print(f"⚠️ Redis caching failed: {e}")
+
+
+async def point_forecast_versions_async(versions):
+    """
+    Points series at the given versions ({series_id: version}) in one pipelined
+    round trip, e.g. after the registry promoted or rolled back a model. A version
+    whose vector isn't cached yet is simply a miss that recomputes it; a version of
+    None drops the pointer, so the next read recomputes from the latest model.
+    """
+    if not async_redis_client or not versions:
+        return
+    ttl = FORECAST_VECTOR_TTL + FORECAST_STALE_TTL
+    try:
+        async with async_redis_client.pipeline(transaction=False) as pipe:
+            for series_id, version in versions.items():
+                if version is None:
+                    pipe.delete(forecast_version_key(series_id))
+                else:
+                    pipe.set(forecast_version_key(series_id), _version_tag(version), ex=ttl)
+            await pipe.execute()
+    except Exception as e:
+        print(f"⚠️ Redis pointer update failed: {e}")
+
+
+# --- Cross-worker recompute lock ---
+
+async def acquire_lock_async(name, ttl_ms=FORECAST_LOCK_TTL_MS):
+    """
+    Tries to take a short Redis lock (SET NX PX). Returns a token on success, None if
+    another worker holds it. Without Redis there is nobody to coordinate with, so the
+    lock is always granted.
+    """
+    token = uuid.uuid4().hex
+    if not async_redis_client:
+        return token
+    try:
+        acquired = await async_redis_client.set(f"lock:{name}", token, nx=True, px=ttl_ms)
+        return token if acquired else None
+    except Exception as e:
+        print(f"⚠️ Redis lock error (proceeding without lock): {e}")
+        return token
+
+
+async def release_lock_async(name, token):
+    if not async_redis_client:
+        return
+    try:
+        await async_redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, f"lock:{name}", token)
+    except Exception as e:
+        print(f"⚠️ Redis lock release failed (it will expire): {e}")
+
+
+async def wait_for_forecast_vector_async(series_id, min_steps, timeout_ms=FORECAST_LOCK_TTL_MS, poll_ms=50):
+    """Polls Redis until another worker publishes a long-enough fresh vector, or gives up (None)."""
+    deadline = time.monotonic() + timeout_ms / 1000.0
+    while time.monotonic() < deadline:
+        await asyncio.sleep(poll_ms / 1000.0)
+        entry = await get_forecast_entry_async(series_id)
+        if entry and not is_expired(entry) and len(entry["vector"]["values"]) >= min_steps:
+            return entry["vector"]
+    return None
@@ -0,0 +1,149 @@
+import os
+import re
+import hashlib
+import tempfile
+from contextlib import contextmanager
+from botocore.exceptions import ClientError
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, concurrent misses may both download
+    fcntl = None
+
+
+class DiskArtifactCache:
+    """
+    Host-wide cache of artifacts downloaded from S3, shared by every worker process
+    on the machine. Files are keyed by S3 key + ETag and written atomically (temp
+    file + rename). A cached file is revalidated with a conditional GET
+    (If-None-Match), so an unchanged artifact costs a 304 instead of a download, and
+    a per-key file lock lets concurrent misses download it only once. The total size
+    is kept under a budget by evicting the least recently used files (every use
+    bumps the file's mtime).
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def fetch(self, s3_client, bucket, key):
+        """
+        Returns (raw_bytes, etag, downloaded) for s3://bucket/key; `downloaded` is
+        False when the bytes came from disk after S3 confirmed they are current.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with self._locked(key):
+            cached = self._lookup(key)
+            if cached:
+                etag, path = cached
+                try:
+                    response = s3_client.get_object(Bucket=bucket, Key=key, IfNoneMatch=etag)
+                except ClientError as e:
+                    if e.response.get("Error", {}).get("Code") not in ("304", "NotModified"):
+                        raise
+                    raw = self._read(path)
+                    if raw is not None:
+                        return raw, etag, False
+                    # Evicted by another process between lookup and read
+                    response = s3_client.get_object(Bucket=bucket, Key=key)
+            else:
+                response = s3_client.get_object(Bucket=bucket, Key=key)
+
+            raw, etag = response["Body"].read(), response["ETag"]
+            self._store(key, etag, raw)
+            return raw, etag, True
+
+    def stats(self):
+        files = self._files()
+        return {"files": len(files), "bytes": sum(size for _, size, _ in files), "max_bytes": self.max_bytes}
+
+    # --- Internal helpers ---
+
+    def _stem(self, key):
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def _lookup(self, key):
+        """(etag, path) of the cached copy of a key, or None."""
+        stem = self._stem(key)
+        for name in os.listdir(self.directory):
+            if name.startswith(stem + "_") and name.endswith(".blob"):
+                # S3 ETags are quoted hex (plus "-N" for multipart uploads)
+                return f'"{name[len(stem) + 1:-len(".blob")]}"', os.path.join(self.directory, name)
+        return None
+
+    def _read(self, path):
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+            os.utime(path)  # LRU: mark as recently used
+            return raw
+        except FileNotFoundError:
+            return None
+
+    def _store(self, key, etag, raw):
+        stem = self._stem(key)
+        tag = re.sub(r"[^A-Za-z0-9-]", "", etag)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(raw)
+            os.replace(tmp_path, os.path.join(self.directory, f"{stem}_{tag}.blob"))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        # Older versions of this key are never served again
+        for name in os.listdir(self.directory):
+            if name.startswith(stem + "_") and name != f"{stem}_{tag}.blob":
+                self._remove(os.path.join(self.directory, name))
+        self._evict()
+
+    def _files(self):
+        """[(mtime, size, path)] of cached blobs."""
+        files = []
+        if not os.path.isdir(self.directory):
+            return files
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".blob"):
+                try:
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+                except FileNotFoundError:
+                    pass
+        return files
+
+    def _evict(self):
+        files = sorted(self._files())
+        total = sum(size for _, size, _ in files)
+        # Oldest first; the file just written is the newest, so it goes last
+        for _, size, path in files[:-1]:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    @contextmanager
+    def _locked(self, key):
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, f"{self._stem(key)}.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+# Shared by every ArtifactManager in S3 mode (set ARTIFACT_DISK_CACHE_MAX_BYTES=0 to disable)
+_disk_cache_bytes = int(os.getenv("ARTIFACT_DISK_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+disk_cache = DiskArtifactCache(
+    directory=os.getenv("ARTIFACT_DISK_CACHE_DIR", os.path.join(tempfile.gettempdir(), "mfe-artifact-cache")),
+    max_bytes=_disk_cache_bytes,
+) if _disk_cache_bytes > 0 else None
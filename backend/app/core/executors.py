@@ -0,0 +1,33 @@
+import os
+import asyncio
+import contextvars
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+# Blocking I/O (boto3 downloads, local file reads) gets its own pool so a slow S3
+# request never starves CPU-bound forecasting, and vice versa.
+ARTIFACT_IO_WORKERS = int(os.getenv("ARTIFACT_IO_WORKERS", "8"))
+FORECAST_CPU_WORKERS = int(os.getenv("FORECAST_CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+io_executor = ThreadPoolExecutor(max_workers=ARTIFACT_IO_WORKERS, thread_name_prefix="artifact-io")
+cpu_executor = ThreadPoolExecutor(max_workers=FORECAST_CPU_WORKERS, thread_name_prefix="forecast-cpu")
+
+
+def _in_context(func, *args, **kwargs):
+    # run_in_executor does not carry context variables (per-request timings) into the thread
+    return partial(contextvars.copy_context().run, func, *args, **kwargs)
+
+
+async def run_io(func, *args, **kwargs):
+    """Runs a blocking artifact load off the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(io_executor, _in_context(func, *args, **kwargs))
+
+
+async def run_cpu(func, *args, **kwargs):
+    """Runs CPU-bound forecasting on the bounded forecast pool."""
+    return await asyncio.get_running_loop().run_in_executor(cpu_executor, _in_context(func, *args, **kwargs))
+
+
+def shutdown_executors():
+    io_executor.shutdown(wait=False, cancel_futures=True)
+    cpu_executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,97 @@
+import os
+import time
+import contextvars
+from contextlib import contextmanager
+from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+
+# Attach per-request stage timings to responses as a Server-Timing header
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "1") != "0"
+
+# Sub-millisecond Redis hits up to multi-second cold S3 loads
+_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "End-to-end request latency.",
+    ["method", "route", "status"], buckets=_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "forecast_stage_seconds",
+    "Latency of one stage of the forecast path (redis_lookup, artifact_download, "
+    "deserialize, manifest_load, forecast, simulate).",
+    ["stage"], buckets=_BUCKETS,
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_seconds", "Latency of the queries in crud_forecast.",
+    ["query"], buckets=_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "forecast_cache_requests_total",
+    "Cache lookups by cache (redis vectors and response bodies, in-process models, host disk artifacts) and result.",
+    ["cache", "result"],
+)
+ARTIFACT_BYTES = Counter(
+    "artifact_bytes_downloaded_total", "Model artifact bytes read from storage (disk-cache hits excluded).",
+    ["storage"],
+)
+
+# (name, description, seconds) entries for the current request. Executors copy the
+# context into their threads, so stages timed there land in the same list.
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def start_request_timings():
+    """Starts collecting Server-Timing entries for the current request."""
+    timings = []
+    _request_timings.set(timings)
+    return timings
+
+
+def _record(histogram, label, name, desc, seconds):
+    histogram.labels(label).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((name, desc, seconds))
+
+
+@contextmanager
+def timed(stage):
+    """Times a forecast-path stage into STAGE_SECONDS and the request's Server-Timing."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(STAGE_SECONDS, stage, stage, None, time.perf_counter() - started)
+
+
+@contextmanager
+def timed_query(query):
+    """Times a crud_forecast query into DB_QUERY_SECONDS and the request's Server-Timing."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(DB_QUERY_SECONDS, query, "db", query, time.perf_counter() - started)
+
+
+def count_cache(cache, result):
+    CACHE_REQUESTS.labels(cache, result).inc()
+
+
+def count_artifact_bytes(storage, size):
+    ARTIFACT_BYTES.labels(storage).inc(size)
+
+
+def server_timing_header(timings, total_seconds=None):
+    """Formats entries as `name;desc="...";dur=ms`, durations in milliseconds."""
+    parts = []
+    for name, desc, seconds in timings:
+        part = name if desc is None else f'{name};desc="{desc}"'
+        parts.append(f"{part};dur={seconds * 1000:.2f}")
+    if total_seconds is not None:
+        parts.append(f"total;dur={total_seconds * 1000:.2f}")
+    return ", ".join(parts)
+
+
+def render_metrics():
+    """Returns (body, content_type) in the Prometheus text exposition format."""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,129 @@
+import io
+import json
+import zlib
+import struct
+import hashlib
+import numpy as np
+from app.services import state_space
+
+# Layout: MAGIC | uint32 header length | JSON header (manifest, spec, checksum) | zlib(npz payload)
+MAGIC = b"MFEA"
+FORMAT_VERSION = 1
+ARTIFACT_EXTENSION = "mfa"
+
+# State-space system matrices (time-invariant) plus the filter's final one-step-ahead
+# predicted state and covariance: everything needed to forecast, nothing else.
+ARRAY_FIELDS = (
+    "params",
+    "design",
+    "obs_intercept",
+    "transition",
+    "state_intercept",
+    "selection",
+    "state_cov",
+    "obs_cov",
+    "state",
+    "state_cov_pred",
+)
+
+
+class CompactStateSpaceModel:
+    """
+    Forecast-only view of a fitted SARIMAX model. Holds the system matrices and the
+    predicted state for the first out-of-sample period instead of the full
+    SARIMAXResults (training data, fitted values, covariance of the estimates...).
+    """
+
+    def __init__(self, spec, param_names, **arrays):
+        self.spec = spec
+        self.param_names = list(param_names)
+        for name in ARRAY_FIELDS:
+            setattr(self, name, np.asarray(arrays[name], dtype=np.float64))
+
+    @classmethod
+    def from_results(cls, results):
+        """Extracts the compact model from a fitted statsmodels SARIMAXResults."""
+        model = results.model
+        ssm = model.ssm
+        matrices = {}
+        for name in ("design", "obs_intercept", "transition", "state_intercept", "selection", "state_cov", "obs_cov"):
+            # The trailing axis is time; it has length 1 when the system is time-invariant
+            matrix = np.asarray(getattr(ssm, name))
+            if matrix.shape[-1] != 1:
+                raise ValueError(f"Time-varying '{name}' is not supported by the compact artifact format")
+            matrices[name] = matrix[..., 0]
+
+        spec = {
+            "model": type(model).__name__,
+            "order": list(model.order),
+            "seasonal_order": list(model.seasonal_order),
+            "trend": model.trend,
+            "enforce_stationarity": model.enforce_stationarity,
+            "enforce_invertibility": model.enforce_invertibility,
+            "nobs": int(results.nobs),
+        }
+        return cls(
+            spec,
+            results.param_names,
+            params=np.asarray(results.params),
+            state=results.predicted_state[:, -1],
+            state_cov_pred=results.predicted_state_cov[:, :, -1],
+            **matrices,
+        )
+
+    def extend(self, observations):
+        """
+        Feeds new observations through the filter with the parameters fixed.
+        Returns (model, innovations, innovation_vars); the returned model forecasts
+        from after the last observation.
+        """
+        state, state_cov_pred, innovations, innovation_vars = state_space.filter_observations(self, observations)
+        arrays = {name: getattr(self, name) for name in ARRAY_FIELDS}
+        arrays.update(state=state, state_cov_pred=state_cov_pred)
+        spec = dict(self.spec, nobs=self.spec.get("nobs", 0) + len(observations))
+        return CompactStateSpaceModel(spec, self.param_names, **arrays), innovations, innovation_vars
+
+    def forecast(self, steps):
+        """Point forecasts for the next `steps` periods (same values as SARIMAXResults.forecast)."""
+        return state_space.forecast(self, steps)
+
+    def forecast_with_variance(self, steps):
+        """Point forecasts and forecast-error variances (as in SARIMAXResults.get_forecast)."""
+        return state_space.forecast(self, steps, variances=True)
+
+
+def dump_artifact(model, manifest):
+    """Serializes a compact model with its manifest into a single checksummed blob."""
+    arrays = io.BytesIO()
+    np.savez(arrays, **{name: getattr(model, name) for name in ARRAY_FIELDS})
+    payload = zlib.compress(arrays.getvalue(), 6)
+    header = json.dumps({
+        "format_version": FORMAT_VERSION,
+        "manifest": manifest,
+        "spec": model.spec,
+        "param_names": model.param_names,
+        "sha256": hashlib.sha256(payload).hexdigest(),
+    }).encode("utf-8")
+    return MAGIC + struct.pack(">I", len(header)) + header + payload
+
+
+def read_header(raw):
+    """Parses only the JSON header (manifest, spec, checksum) of an artifact blob."""
+    if raw[:4] != MAGIC:
+        raise ValueError("Not a model artifact (bad magic bytes)")
+    (header_length,) = struct.unpack(">I", raw[4:8])
+    header = json.loads(raw[8:8 + header_length].decode("utf-8"))
+    if header.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format version: {header.get('format_version')}")
+    return header, 8 + header_length
+
+
+def load_artifact(raw):
+    """Verifies and deserializes an artifact blob. Returns (model, manifest)."""
+    header, offset = read_header(raw)
+    payload = raw[offset:]
+    if hashlib.sha256(payload).hexdigest() != header["sha256"]:
+        raise ValueError("Model artifact checksum mismatch")
+    with np.load(io.BytesIO(zlib.decompress(payload))) as arrays:
+        model = CompactStateSpaceModel(header["spec"], header["param_names"], **{name: arrays[name] for name in ARRAY_FIELDS})
+    return model, header["manifest"]
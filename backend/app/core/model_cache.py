@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheEntry:
+    __slots__ = ("version", "value", "size", "checked_at")
+
+    def __init__(self, version, value, size):
+        self.version = version
+        self.value = value
+        self.size = size
+        self.checked_at = time.monotonic()
+
+
+class ModelCache:
+    """
+    Process-wide LRU of deserialized artifacts (models and manifests).
+    Entries are keyed by (kind, series_id) and remember the artifact version
+    (S3 ETag or local mtime/size) they were built from. The budget is expressed
+    in bytes of the serialized artifact, not in number of entries.
+    """
+
+    def __init__(self, max_bytes, revalidate_seconds):
+        self.max_bytes = max_bytes
+        self.revalidate_seconds = revalidate_seconds
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, kind, series_id):
+        """Returns the cached entry (most recently used) or None."""
+        with self._lock:
+            entry = self._entries.get((kind, series_id))
+            if entry is not None:
+                self._entries.move_to_end((kind, series_id))
+            return entry
+
+    def is_fresh(self, entry):
+        """True if the entry was validated against storage recently enough to skip a version check."""
+        return time.monotonic() - entry.checked_at < self.revalidate_seconds
+
+    def mark_validated(self, entry):
+        entry.checked_at = time.monotonic()
+
+    def put(self, kind, series_id, version, value, size):
+        if size > self.max_bytes:
+            # Larger than the whole budget: never cache, just drop any older copy
+            self.invalidate(series_id, kind)
+            return
+        with self._lock:
+            old = self._entries.pop((kind, series_id), None)
+            if old is not None:
+                self._total_bytes -= old.size
+            self._entries[(kind, series_id)] = CacheEntry(version, value, size)
+            self._total_bytes += size
+            while self._total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= evicted.size
+
+    def invalidate(self, series_id, kind=None):
+        """Drops cached artifacts for a series (all kinds unless one is given)."""
+        with self._lock:
+            for key in [k for k in self._entries if k[1] == series_id and (kind is None or k[0] == kind)]:
+                self._total_bytes -= self._entries.pop(key).size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+# Shared by every ArtifactManager in the process
+model_cache = ModelCache(
+    max_bytes=int(os.getenv("MODEL_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+    revalidate_seconds=float(os.getenv("MODEL_CACHE_REVALIDATE_SECONDS", "60")),
+)
@@ -0,0 +1,23 @@
+import gzip
+import json
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback: same compact output, several times slower
+    orjson = None
+
+
+def dumps_json(obj) -> bytes:
+    """Compact UTF-8 JSON, as FastAPI's JSONResponse would render it."""
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def gzip_body(body: bytes) -> bytes:
+    # mtime=0 keeps the bytes deterministic for the same body
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def accepts_gzip(accept_encoding) -> bool:
+    return bool(accept_encoding) and "gzip" in accept_encoding.lower()
@@ -0,0 +1,39 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    In-process request coalescing: concurrent callers asking for the same key share
+    one in-flight computation instead of each running it.
+    """
+
+    def __init__(self):
+        self._flights = {}
+
+    def in_flight(self, key):
+        return key in self._flights
+
+    async def do(self, key, func, *args, **kwargs):
+        """Awaits the running computation for `key`, starting `func(*args, **kwargs)` if there is none."""
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._flights[key] = task
+            task.add_done_callback(lambda _: self._flights.pop(key, None))
+        # Shield so one cancelled caller (client disconnect) doesn't cancel it for everyone
+        return await asyncio.shield(task)
+
+    def start(self, key, func, *args, **kwargs):
+        """Starts the computation for `key` in the background unless one is already running."""
+        if key in self._flights:
+            return
+        task = asyncio.ensure_future(func(*args, **kwargs))
+        self._flights[key] = task
+        task.add_done_callback(self._background_done(key))
+
+    def _background_done(self, key):
+        def done(task):
+            self._flights.pop(key, None)
+            if not task.cancelled() and task.exception() is not None:
+                print(f"⚠️ Background refresh for {key} failed: {task.exception()}")
+        return done
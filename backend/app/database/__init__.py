@@ -1 +1 @@
-from .crud_forecast import get_available_materials
\ No newline at end of file
+from .crud_forecast import get_available_materials, get_available_materials_async
\ No newline at end of file
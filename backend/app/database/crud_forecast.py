@@ -1,10 +1,70 @@
 from sqlalchemy import text
-from .session import engine 
+from .session import engine, async_engine
+from app.core.metrics import timed_query
+
+# Shared by the sync (scripts) and async (API) variants below
+# series_catalog has one row per series (maintained by ingestion): no raw_series scan
+MATERIALS_QUERY = text("SELECT series_id FROM series_catalog ORDER BY series_id")
+CATALOG_QUERY = text(
+    "SELECT series_id, source, first_date, last_date, row_count, last_ingest_hash, updated_at "
+    "FROM series_catalog ORDER BY series_id"
+)
+# Change marker for the API's in-process catalog
+CATALOG_MARKER_QUERY = text("SELECT COUNT(*) AS series_count, MAX(updated_at) AS updated_at FROM series_catalog")
+HISTORICAL_DATA_QUERY = text("SELECT date, value FROM raw_series WHERE series_id = :series_id ORDER BY date")
+PRECOMPUTED_FORECAST_QUERY = text(
+    "SELECT model_version, start_date, values_json FROM precomputed_forecasts "
+    "WHERE series_id = :series_id ORDER BY created_at DESC LIMIT 1"
+)
+# Fingerprint of a series' stored data: its catalog row, whose hash changes whenever
+# ingestion adds or revises rows (a primary-key lookup)
+SERIES_MARKER_QUERY = text(
+    "SELECT row_count, last_date, last_ingest_hash FROM series_catalog WHERE series_id = :series_id"
+)
+# Newest vector per series for many series in one round trip
+PRECOMPUTED_FORECASTS_QUERY = text(
+    "SELECT DISTINCT ON (series_id) series_id, model_version, start_date, values_json "
+    "FROM precomputed_forecasts WHERE series_id = ANY(:series_ids) "
+    "ORDER BY series_id, created_at DESC"
+)
+# Vector of one specific model version (the registry's production version)
+PRECOMPUTED_FORECAST_VERSION_QUERY = text(
+    "SELECT model_version, start_date, values_json FROM precomputed_forecasts "
+    "WHERE series_id = :series_id AND model_version = :version"
+)
+# Candidates for several (series, version) pairs; exact pairs are picked in Python
+PRECOMPUTED_FORECASTS_VERSIONS_QUERY = text(
+    "SELECT series_id, model_version, start_date, values_json FROM precomputed_forecasts "
+    "WHERE series_id = ANY(:series_ids) AND model_version = ANY(:versions)"
+)
+# Registry snapshot: a cheap change marker, and the production version of each model
+REGISTRY_MARKER_QUERY = text("SELECT COUNT(*) AS model_count, MAX(updated_at) AS updated_at FROM models")
+PRODUCTION_VERSIONS_QUERY = text("SELECT name, version FROM models WHERE is_production")
+# Series whose models should be preloaded at startup: production models if any are flagged
+PRODUCTION_MODELS_QUERY = text("SELECT DISTINCT name FROM models WHERE is_production")
+REGISTERED_MODELS_QUERY = text("SELECT DISTINCT name FROM models")
+
+
+def _format_historical(rows):
+    # Return data in a format easily convertible to JSON
+    return [{"date": row.date.strftime('%Y-%m-%d'), "value": row.value} for row in rows]
+
+
+def _format_precomputed(row):
+    if row is None:
+        return None
+    return {
+        "version": row.model_version,
+        "start_date": row.start_date.strftime('%Y-%m-%d'),
+        "values": row.values_json,
+    }
+
+
 def get_available_materials():
     """Returns a list of all available forecastable materials from the DB."""
     try:
         with engine.connect() as connection:
-            result = connection.execute(text("SELECT DISTINCT series_id FROM raw_series"))
+            result = connection.execute(MATERIALS_QUERY)
             return [row[0] for row in result]
     except Exception as e:
         print(f"Database query failed: {e}")
@@ -14,10 +74,190 @@ def get_historical_data(series_id: str):
     """Fetches all historical data points for a given series_id."""
     try:
         with engine.connect() as connection:
-            query = text("SELECT date, value FROM raw_series WHERE series_id = :series_id ORDER BY date")
-            result = connection.execute(query, {"series_id": series_id})
-            # Return data in a format easily convertible to JSON
-            return [{"date": row.date.strftime('%Y-%m-%d'), "value": row.value} for row in result]
+            result = connection.execute(HISTORICAL_DATA_QUERY, {"series_id": series_id})
+            return _format_historical(result)
     except Exception as e:
         print(f"Database query for historical data failed: {e}")
-        return []
\ No newline at end of file
+        return []
+
+
+def get_precomputed_forecast(series_id: str):
+    """Fetches the newest max-horizon forecast vector written at training time."""
+    try:
+        with engine.connect() as connection:
+            return _format_precomputed(connection.execute(PRECOMPUTED_FORECAST_QUERY, {"series_id": series_id}).first())
+    except Exception as e:
+        print(f"Database query for precomputed forecast failed: {e}")
+        return None
+
+
+# --- Async variants (used by the API so DB waits never block a worker thread) ---
+
+async def get_available_materials_async():
+    """Async version of get_available_materials."""
+    try:
+        with timed_query("materials"):
+            async with async_engine.connect() as connection:
+                result = await connection.execute(MATERIALS_QUERY)
+                return [row[0] for row in result]
+    except Exception as e:
+        print(f"Database query failed: {e}")
+        return []
+
+
+async def get_series_catalog_async():
+    """Returns every series_catalog row as a dict, or None if the catalog cannot be read."""
+    try:
+        with timed_query("series_catalog"):
+            async with async_engine.connect() as connection:
+                result = await connection.execute(CATALOG_QUERY)
+                return [dict(row._mapping) for row in result]
+    except Exception as e:
+        print(f"Database query for series catalog failed: {e}")
+        return None
+
+
+async def get_catalog_marker_async():
+    """Returns a string that changes whenever the series catalog does, or None on error."""
+    try:
+        with timed_query("catalog_marker"):
+            async with async_engine.connect() as connection:
+                row = (await connection.execute(CATALOG_MARKER_QUERY)).first()
+        return f"{row.series_count}:{row.updated_at.isoformat() if row.updated_at else ''}"
+    except Exception as e:
+        print(f"Database query for catalog marker failed: {e}")
+        return None
+
+
+async def get_precomputed_forecast_async(series_id: str, version=None):
+    """Async version of get_precomputed_forecast; with `version`, that model version's vector."""
+    try:
+        with timed_query("precomputed_forecast"):
+            async with async_engine.connect() as connection:
+                if version is None:
+                    result = await connection.execute(PRECOMPUTED_FORECAST_QUERY, {"series_id": series_id})
+                else:
+                    result = await connection.execute(PRECOMPUTED_FORECAST_VERSION_QUERY, {"series_id": series_id, "version": version})
+                return _format_precomputed(result.first())
+    except Exception as e:
+        print(f"Database query for precomputed forecast failed: {e}")
+        return None
+
+
+async def get_precomputed_forecasts_async(series_ids, versions=None):
+    """
+    Fetches a precomputed vector for each of several series: the version given in
+    `versions` ({series_id: version}) if any, else the newest. Returns {series_id: vector}.
+    """
+    if not series_ids:
+        return {}
+    versions = {series_id: versions[series_id] for series_id in series_ids if versions and versions.get(series_id)}
+    newest = [series_id for series_id in series_ids if series_id not in versions]
+    try:
+        with timed_query("precomputed_forecasts"):
+            async with async_engine.connect() as connection:
+                vectors = {}
+                if versions:
+                    result = await connection.execute(PRECOMPUTED_FORECASTS_VERSIONS_QUERY, {
+                        "series_ids": list(versions), "versions": list(set(versions.values()))
+                    })
+                    vectors.update({row.series_id: _format_precomputed(row) for row in result if versions[row.series_id] == row.model_version})
+                if newest:
+                    result = await connection.execute(PRECOMPUTED_FORECASTS_QUERY, {"series_ids": newest})
+                    vectors.update({row.series_id: _format_precomputed(row) for row in result})
+                return vectors
+    except Exception as e:
+        print(f"Database query for precomputed forecasts failed: {e}")
+        return {}
+
+
+async def get_production_model_names_async():
+    """
+    Names of the production models in the registry, or of every registered model
+    when none is flagged production yet. None if the registry cannot be read.
+    """
+    try:
+        with timed_query("production_models"):
+            async with async_engine.connect() as connection:
+                names = [row[0] for row in await connection.execute(PRODUCTION_MODELS_QUERY)]
+                if not names:
+                    names = [row[0] for row in await connection.execute(REGISTERED_MODELS_QUERY)]
+                return names
+    except Exception as e:
+        print(f"Database query for production models failed: {e}")
+        return None
+
+
+async def get_registry_marker_async():
+    """Returns a string that changes whenever the model registry does, or None on error."""
+    try:
+        with timed_query("registry_marker"):
+            async with async_engine.connect() as connection:
+                row = (await connection.execute(REGISTRY_MARKER_QUERY)).first()
+        return f"{row.model_count}:{row.updated_at.isoformat() if row.updated_at else ''}"
+    except Exception as e:
+        print(f"Database query for registry marker failed: {e}")
+        return None
+
+
+async def get_production_versions_async():
+    """Returns {model name: production version}, or None if the registry cannot be read."""
+    try:
+        with timed_query("production_versions"):
+            async with async_engine.connect() as connection:
+                return {row.name: row.version for row in await connection.execute(PRODUCTION_VERSIONS_QUERY)}
+    except Exception as e:
+        print(f"Database query for production versions failed: {e}")
+        return None
+
+
+async def get_series_marker_async(series_id: str):
+    """
+    Returns a string identifying the current contents of a series: "" if it has no
+    data, None if the database cannot be read.
+    """
+    try:
+        with timed_query("series_marker"):
+            async with async_engine.connect() as connection:
+                row = (await connection.execute(SERIES_MARKER_QUERY, {"series_id": series_id})).first()
+        if row is None or not row.row_count:
+            return ""
+        return f"{row.row_count}:{row.last_date.isoformat()}:{row.last_ingest_hash}"
+    except Exception as e:
+        print(f"Database query for series marker failed: {e}")
+        return None
+
+
+async def get_historical_page_async(series_id: str, start=None, end=None, after=None, limit=None):
+    """
+    Range-filtered, keyset-paginated history. Filtering, ordering and LIMIT all run in SQL,
+    and dates are formatted by Postgres. Returns a list of (date, day, value) rows where
+    `day` is the 'YYYY-MM-DD' string, or None if the query fails.
+    """
+    clauses = ["series_id = :series_id"]
+    params = {"series_id": series_id}
+    if start is not None:
+        clauses.append("date >= :start")
+        params["start"] = start
+    if end is not None:
+        clauses.append("date <= :end")
+        params["end"] = end
+    if after is not None:
+        clauses.append("date > :after")
+        params["after"] = after
+    sql = (
+        "SELECT date, to_char(date, 'YYYY-MM-DD') AS day, value FROM raw_series "
+        f"WHERE {' AND '.join(clauses)} ORDER BY date"
+    )
+    if limit is not None:
+        sql += " LIMIT :limit"
+        params["limit"] = limit
+
+    try:
+        with timed_query("historical_page"):
+            async with async_engine.connect() as connection:
+                result = await connection.execute(text(sql), params)
+                return result.all()
+    except Exception as e:
+        print(f"Database query for historical page failed: {e}")
+        return None
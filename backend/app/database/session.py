@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
 from app.core.config import DATABASE_URL
 
 # SQLAlchemy expects the 'postgresql' dialect name. Some platforms
@@ -8,4 +9,8 @@ from app.core.config import DATABASE_URL
 db_url = DATABASE_URL.replace("postgres://", "postgresql://", 1) if DATABASE_URL else DATABASE_URL
 
 # Create a single, reusable engine that manages a connection pool
-engine = create_engine(db_url)
\ No newline at end of file
+engine = create_engine(db_url)
+
+# Async engine (asyncpg driver) used by the API's request path
+async_db_url = db_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+async_engine = create_async_engine(async_db_url, pool_pre_ping=True)
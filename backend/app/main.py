@@ -1,9 +1,54 @@
-from fastapi import FastAPI
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
 from app.api.endpoints import forecast
+from app.core.artifact_manager import get_artifact_manager
+from app.core.cache import async_redis_client, async_redis_bytes_client
+from app.core.executors import shutdown_executors
+from app.core.metrics import (
+    REQUEST_SECONDS,
+    SERVER_TIMING_ENABLED,
+    render_metrics,
+    server_timing_header,
+    start_request_timings,
+)
+from app.database.session import async_engine
+from app.services.registry import registry_snapshot
+from app.services.catalog import series_catalog
+from app.services.warmup import MODEL_WARMUP_ENABLED, warm_models, warmup_state
 from fastapi.middleware.cors import CORSMiddleware
 
 
-app = FastAPI(title="Contech Forecasting API", version="1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Preload production models in the background: the port binds right away (no boot
+    # timeout risk) and /ready turns 200 once every model is in the cache
+    warmup_task = None
+    if MODEL_WARMUP_ENABLED:
+        warmup_task = asyncio.create_task(warm_models(get_artifact_manager()))
+    else:
+        warmup_state.status = "ready"
+    # Keep the production versions in sync with the registry (promotion/rollback)
+    registry_task = asyncio.create_task(registry_snapshot.run())
+    # ...and /materials in sync with the series catalog (new ingests)
+    catalog_task = asyncio.create_task(series_catalog.run())
+    yield
+    registry_task.cancel()
+    catalog_task.cancel()
+    if warmup_task and not warmup_task.done():
+        warmup_task.cancel()
+    # Release async connections and executor threads on shutdown
+    if async_redis_client:
+        await async_redis_client.aclose()
+    if async_redis_bytes_client:
+        await async_redis_bytes_client.aclose()
+    await async_engine.dispose()
+    shutdown_executors()
+
+
+app = FastAPI(title="Contech Forecasting API", version="1.0", lifespan=lifespan)
 
 # --- CORS (Cross-Origin Resource Sharing) Configuration ---
 origins = [
@@ -21,8 +66,25 @@ app.add_middleware(
     allow_credentials=True, # Allow cookies to be included in requests
     allow_methods=["*"],    # Allow all methods (GET, POST, etc.)
     allow_headers=["*"],    # Allow all headers
+    expose_headers=["ETag", "X-Next-Cursor", "Server-Timing"],  # Let browsers read caching/pagination/timing headers
 )
 
+
+# --- Metrics: request latency histogram + per-stage Server-Timing header ---
+@app.middleware("http")
+async def record_timings(request: Request, call_next):
+    timings = start_request_timings()
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+
+    # Label by route template (/historical-data/{material_id}), not the raw path
+    route = request.scope.get("route")
+    REQUEST_SECONDS.labels(request.method, getattr(route, "path", "unmatched"), str(response.status_code)).observe(elapsed)
+    if SERVER_TIMING_ENABLED:
+        response.headers["Server-Timing"] = server_timing_header(timings, elapsed)
+    return response
+
 # Include the forecasting router
 app.include_router(forecast.router)
 
@@ -30,4 +92,17 @@ app.include_router(forecast.router)
 @app.get("/health", tags=["Health"])
 def health_check():
     """Checks if the API is running."""
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+# Prometheus scrape target
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+# Readiness: 503 until the startup warm-up has loaded the production models
+@app.get("/ready", tags=["Health"])
+def readiness_check():
+    """Reports warm-up progress and per-model load times."""
+    report = warmup_state.report()
+    return JSONResponse(report, status_code=200 if report["status"] == "ready" else 503)
\ No newline at end of file
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+from app.services.forecasting import MAX_REQUEST_HORIZON
 
 class ForecastItem(BaseModel):
     date: str
@@ -9,4 +10,47 @@ class ForecastResponse(BaseModel):
     material_id: str
     forecast: List[ForecastItem]
     source: str
-    storage_mode: str
\ No newline at end of file
+    storage_mode: str
+
+class SeriesCatalogItem(BaseModel):
+    series_id: str
+    source: Optional[str] = None
+    first_date: str
+    last_date: str
+    row_count: int
+    updated_at: str
+
+class BatchForecastRequestItem(BaseModel):
+    material_id: str
+    horizon: int = Field(12, ge=1, le=MAX_REQUEST_HORIZON)
+
+class BatchForecastRequest(BaseModel):
+    items: List[BatchForecastRequestItem] = Field(..., min_length=1, max_length=100)
+
+class BatchForecastResult(BaseModel):
+    material_id: str
+    horizon: int
+    forecast: Optional[List[ForecastItem]] = None
+    source: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchForecastResponse(BaseModel):
+    results: List[BatchForecastResult]
+    storage_mode: str
+
+class ScenarioItem(BaseModel):
+    date: str
+    quantiles: Dict[str, float]
+
+class ScenarioResult(BaseModel):
+    material_id: str
+    forecast: Optional[List[ScenarioItem]] = None
+    source: Optional[str] = None
+    error: Optional[str] = None
+
+class ScenarioResponse(BaseModel):
+    horizon: int
+    paths: int
+    quantiles: List[float]
+    results: List[ScenarioResult]
+    storage_mode: str
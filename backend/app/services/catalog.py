@@ -0,0 +1,82 @@
+import os
+import time
+import asyncio
+import hashlib
+from app.core.serialization import dumps_json
+from app.database.crud_forecast import get_catalog_marker_async, get_series_catalog_async
+
+# How often the API checks the catalog's change marker; ingestion runs at most daily
+CATALOG_REFRESH_SECONDS = float(os.getenv("CATALOG_REFRESH_SECONDS", "30"))
+
+
+def _catalog_item(row):
+    return {
+        "series_id": row["series_id"],
+        "source": row["source"],
+        "first_date": row["first_date"].strftime('%Y-%m-%d'),
+        "last_date": row["last_date"].strftime('%Y-%m-%d'),
+        "row_count": row["row_count"],
+        "updated_at": row["updated_at"].isoformat(),
+    }
+
+
+class SeriesCatalogSnapshot:
+    """
+    In-process copy of the series_catalog table. /materials and /materials/catalog are
+    answered from response bodies serialized once per change; a background task polls a
+    cheap change marker (series count + latest updated_at) and reloads the rows only
+    after an ingest changed them.
+    """
+
+    def __init__(self):
+        self.entries = {}   # series_id -> catalog item
+        self.marker = None
+        self.etag = None
+        self.materials_body = None
+        self.catalog_body = None
+        self.loaded = False
+        self.refreshed_at = None
+
+    async def ensure_loaded(self):
+        """Loads the catalog on first use (e.g. a request before the first poll)."""
+        if not self.loaded:
+            await self.refresh()
+        return self.loaded
+
+    async def refresh(self):
+        """Reloads the catalog if it changed. Returns True if it did."""
+        marker = await get_catalog_marker_async()
+        if marker is None or marker == self.marker:
+            # Unchanged, or the DB is unreachable: keep serving the last snapshot
+            return False
+        rows = await get_series_catalog_async()
+        if rows is None:
+            return False
+
+        entries = {row["series_id"]: _catalog_item(row) for row in rows}
+        self.materials_body = dumps_json(list(entries))
+        self.catalog_body = dumps_json(list(entries.values()))
+        self.etag = f'"{hashlib.sha1(marker.encode("utf-8")).hexdigest()}"'
+        self.entries, self.marker, self.loaded = entries, marker, True
+        self.refreshed_at = time.time()
+        print(f"🗂️ Catalog: {len(entries)} series")
+        return True
+
+    async def run(self, interval=CATALOG_REFRESH_SECONDS):
+        """Polls the catalog until cancelled."""
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"⚠️ Catalog refresh failed: {e}")
+            await asyncio.sleep(interval)
+
+    def report(self):
+        return {
+            "series": len(self.entries),
+            "loaded": self.loaded,
+            "refreshed_at": self.refreshed_at,
+        }
+
+
+series_catalog = SeriesCatalogSnapshot()
@@ -1,4 +1,141 @@
-import pandas as pd
+import os
+import numpy as np
+from datetime import date, datetime
+from app.core.model_artifact import CompactStateSpaceModel
+from app.services import state_space
+
+# Training precomputes forecasts up to this many months; serving slices shorter horizons
+MAX_FORECAST_HORIZON = int(os.getenv("MAX_FORECAST_HORIZON", "36"))
+# Longest horizon a request may ask for; beyond MAX_FORECAST_HORIZON the model runs
+MAX_REQUEST_HORIZON = int(os.getenv("MAX_REQUEST_HORIZON", "120"))
+
+# Monte Carlo scenarios: default and maximum simulated paths per material
+SCENARIO_PATHS = int(os.getenv("SCENARIO_PATHS", "10000"))
+SCENARIO_MAX_PATHS = int(os.getenv("SCENARIO_MAX_PATHS", "50000"))
+# Longest simulated horizon a request may ask for (months)
+SCENARIO_MAX_HORIZON = int(os.getenv("SCENARIO_MAX_HORIZON", "120"))
+DEFAULT_SCENARIO_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+# Simulated values (materials x paths x months) held in memory at once (~32 MB)
+SCENARIO_CHUNK_CELLS = 4_000_000
+
+
+def _month_starts(first_month, count):
+    """Returns `count` consecutive month-start dates beginning at `first_month`."""
+    year, month = first_month.year, first_month.month
+    dates = []
+    for _ in range(count):
+        dates.append(date(year, month, 1))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return dates
+
+
+def _next_month(last_training_date):
+    last = datetime.fromisoformat(str(last_training_date))
+    return date(last.year + 1, 1, 1) if last.month == 12 else date(last.year, last.month + 1, 1)
+
+
+def build_forecast_vector(model, last_training_date, horizon: int, version=None):
+    """
+    Runs the model once for `horizon` steps and returns a storable vector:
+    {"version", "start_date", "values"}. Any shorter horizon is a slice of it.
+    """
+    values = model.forecast(steps=horizon)
+    return {
+        "version": version,
+        "start_date": _next_month(last_training_date).isoformat(),
+        "values": [float(v) for v in values],
+    }
+
+
+def build_forecast_vectors(models, last_training_dates, steps, versions):
+    """
+    Batched build_forecast_vector: compact state-space models are forecast together
+    in one vectorized pass; any other model type is run individually.
+    """
+    compact = [i for i, model in enumerate(models) if isinstance(model, CompactStateSpaceModel)]
+    values = {}
+    if compact:
+        means, _ = state_space.forecast_batch([models[i] for i in compact], steps, variances=False)
+        values.update({i: means[row] for row, i in enumerate(compact)})
+    for i, model in enumerate(models):
+        if i not in values:
+            values[i] = model.forecast(steps=steps)
+
+    return [
+        {
+            "version": versions[i],
+            "start_date": _next_month(last_training_dates[i]).isoformat(),
+            "values": [float(v) for v in values[i]],
+        }
+        for i in range(len(models))
+    ]
+
+
+def quantile_label(q):
+    """0.05 -> "0.05": the key a quantile is reported and cached under."""
+    return format(float(q), "g")
+
+
+def build_scenario_tables(models, last_training_dates, steps, versions, paths, quantiles, rng=None):
+    """
+    Simulates `paths` future paths per model (batched across models and paths) and
+    reduces them to per-month quantiles. Returns one storable table per model:
+    {"version", "start_date", "paths", "quantiles", "values"}, where values[i] holds
+    the monthly values of quantiles[i]. Any shorter horizon is a slice of it.
+    """
+    compact = [m if isinstance(m, CompactStateSpaceModel) else CompactStateSpaceModel.from_results(m) for m in models]
+    quantiles = [float(q) for q in quantiles]
+
+    # Bound memory: simulate as many models at a time as fit in SCENARIO_CHUNK_CELLS,
+    # and a single model's paths in batches of at most that many cells
+    chunk = max(1, SCENARIO_CHUNK_CELLS // (paths * steps))
+    path_chunk = max(1, min(paths, SCENARIO_CHUNK_CELLS // steps))
+    tables = []
+    for first in range(0, len(compact), chunk):
+        group = compact[first:first + chunk]
+        simulated = np.empty((len(group), paths, steps))
+        for first_path in range(0, paths, path_chunk):
+            last_path = min(paths, first_path + path_chunk)
+            simulated[:, first_path:last_path] = state_space.simulate_batch(group, steps, last_path - first_path, rng)
+        values = np.quantile(simulated, quantiles, axis=1)  # (quantile, model, month)
+        for row in range(simulated.shape[0]):
+            i = first + row
+            tables.append({
+                "version": versions[i],
+                "start_date": _next_month(last_training_dates[i]).isoformat(),
+                "paths": paths,
+                "quantiles": quantiles,
+                "values": values[:, row].tolist(),
+            })
+    return tables
+
+
+def slice_scenario_table(table, horizon: int):
+    """Formats the first `horizon` months of a scenario table as [{date, quantiles}]."""
+    start = date.fromisoformat(table["start_date"][:10])
+    labels = [quantile_label(q) for q in table["quantiles"]]
+    months = _month_starts(start, min(horizon, len(table["values"][0])))
+    return [
+        {
+            "date": d.strftime("%Y-%m-%d"),
+            "quantiles": {label: round(values[h], 2) for label, values in zip(labels, table["values"])},
+        }
+        for h, d in enumerate(months)
+    ]
+
+
+def slice_forecast_vector(vector, horizon: int):
+    """
+    Formats the first `horizon` months of a precomputed forecast vector.
+    Pure Python: no model, pandas or statsmodels involved.
+    """
+    values = vector["values"][:horizon]
+    start = date.fromisoformat(vector["start_date"][:10])
+    return [
+        {"date": d.strftime("%Y-%m-%d"), "forecast": round(v, 2)}
+        for d, v in zip(_month_starts(start, len(values)), values)
+    ]
+
 
 def generate_forecast(model, last_training_date, horizon: int):
     """
@@ -6,31 +143,10 @@ def generate_forecast(model, last_training_date, horizon: int):
     This function is stateless and works for any material model.
     """
     try:
-        # 1. Calculate future dates
-        # We use the last_training_date passed from the API (read from the specific material's manifest)
-        start_date = pd.to_datetime(last_training_date)
-        
-        # Generate the range starting from the month AFTER the last training data
-        future_dates = pd.date_range(
-            start=start_date + pd.DateOffset(months=1), 
-            periods=horizon, 
-            freq='MS'
-        )
-
-        # 2. Generate Predictions
         # The model object is already loaded by the API endpoint and passed here
-        forecast_values = model.forecast(steps=horizon)
-
-        # 3. Format Output
-        formatted_forecast = []
-        for date, value in zip(future_dates, forecast_values):
-            formatted_forecast.append({
-                "date": date.strftime("%Y-%m-%d"),
-                "forecast": round(value, 2)
-            })
-            
-        return formatted_forecast
+        vector = build_forecast_vector(model, last_training_date, horizon)
+        return slice_forecast_vector(vector, horizon)
 
     except Exception as e:
         print(f"Error in generate_forecast: {e}")
-        raise e
\ No newline at end of file
+        raise e
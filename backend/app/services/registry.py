@@ -0,0 +1,71 @@
+import os
+import time
+import asyncio
+from app.core.cache import point_forecast_versions_async
+from app.database.crud_forecast import get_registry_marker_async, get_precomputed_forecasts_async, get_production_versions_async
+
+# How often the API checks the registry's change marker (one tiny query, not per request)
+REGISTRY_REFRESH_SECONDS = float(os.getenv("REGISTRY_REFRESH_SECONDS", "5"))
+
+
+class RegistrySnapshot:
+    """
+    In-process copy of the production version of every model in the registry.
+    Requests resolve versions from it with a dict lookup; a background task polls a
+    cheap change marker (model count + latest updated_at) and reloads the versions
+    only when the registry changed, e.g. after a promotion or rollback.
+    """
+
+    def __init__(self):
+        self.versions = {}   # series_id -> production version
+        self.marker = None
+        self.loaded = False
+        self.refreshed_at = None
+
+    def production_version(self, series_id):
+        """The series' production version, or None (serve its latest artifact)."""
+        return self.versions.get(series_id)
+
+    async def refresh(self):
+        """Reloads the versions if the registry changed. Returns True if it did."""
+        marker = await get_registry_marker_async()
+        if marker is None or marker == self.marker:
+            # Unchanged, or the DB is unreachable: keep serving the last snapshot
+            return False
+        versions = await get_production_versions_async()
+        if versions is None:
+            return False
+
+        changed = {series_id: version for series_id, version in versions.items() if self.versions.get(series_id) != version}
+        demoted = sorted(self.versions.keys() - versions.keys())
+        if demoted:
+            # No production model left: serving falls back to the newest version, so
+            # point at its stored vector (or drop the pointer if there is none)
+            newest = await get_precomputed_forecasts_async(demoted)
+            changed.update({series_id: newest[series_id]["version"] if series_id in newest else None for series_id in demoted})
+        self.versions, self.marker, self.loaded = versions, marker, True
+        self.refreshed_at = time.time()
+        if changed:
+            print(f"📒 Registry: {len(versions)} production models ({len(changed)} changed)")
+            # Switch cached forecasts to the new production versions right away
+            await point_forecast_versions_async(changed)
+        return True
+
+    async def run(self, interval=REGISTRY_REFRESH_SECONDS):
+        """Polls the registry until cancelled."""
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"⚠️ Registry refresh failed: {e}")
+            await asyncio.sleep(interval)
+
+    def report(self):
+        return {
+            "production_models": len(self.versions),
+            "loaded": self.loaded,
+            "refreshed_at": self.refreshed_at,
+        }
+
+
+registry_snapshot = RegistrySnapshot()
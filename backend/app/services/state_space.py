@@ -0,0 +1,183 @@
+import numpy as np
+
+
+def stack_models(models):
+    """
+    Stacks the system matrices of several compact models into batched arrays.
+    Models with fewer states are zero-padded: padded states start at zero, never
+    feed the observed states and so do not change any forecast.
+    """
+    n = len(models)
+    k = max(model.transition.shape[0] for model in models)
+
+    design = np.zeros((n, k))
+    obs_intercept = np.zeros(n)
+    obs_cov = np.zeros(n)
+    transition = np.zeros((n, k, k))
+    state_intercept = np.zeros((n, k))
+    selected_cov = np.zeros((n, k, k))
+    state = np.zeros((n, k))
+    state_cov = np.zeros((n, k, k))
+
+    for i, model in enumerate(models):
+        ki = model.transition.shape[0]
+        design[i, :ki] = model.design[0]
+        obs_intercept[i] = model.obs_intercept[0]
+        obs_cov[i] = model.obs_cov[0, 0]
+        transition[i, :ki, :ki] = model.transition
+        state_intercept[i, :ki] = model.state_intercept
+        # R Q R' is all the variance recursion needs
+        selected_cov[i, :ki, :ki] = model.selection @ model.state_cov @ model.selection.T
+        state[i, :ki] = model.state
+        state_cov[i, :ki, :ki] = model.state_cov_pred
+
+    return {
+        "design": design,
+        "obs_intercept": obs_intercept,
+        "obs_cov": obs_cov,
+        "transition": transition,
+        "state_intercept": state_intercept,
+        "selected_cov": selected_cov,
+        "state": state,
+        "state_cov": state_cov,
+        "k_states": k,
+    }
+
+
+def forecast_batch(models, steps, variances=True):
+    """
+    Point forecasts (and forecast-error variances) for many univariate state-space
+    models at once. Only the recursion over horizons is a Python loop; every step
+    is a batched matrix product across models.
+
+    Returns (means, variances), each shaped (len(models), steps); variances is None
+    when not requested.
+    """
+    system = stack_models(models)
+    Z, d, H = system["design"], system["obs_intercept"], system["obs_cov"]
+    T, c, RQR = system["transition"], system["state_intercept"], system["selected_cov"]
+    a, P = system["state"], system["state_cov"]
+    T_t = np.swapaxes(T, 1, 2)
+
+    means = np.empty((len(models), steps))
+    out_var = np.empty((len(models), steps)) if variances else None
+    for h in range(steps):
+        # y_h = d + Z a_h,   Var(y_h) = Z P_h Z' + H
+        means[:, h] = d + np.einsum("nk,nk->n", Z, a)
+        if variances:
+            out_var[:, h] = np.einsum("nk,nkj,nj->n", Z, P, Z) + H
+            # P_{h+1} = T P_h T' + R Q R'
+            P = T @ P @ T_t + RQR
+        # a_{h+1} = c + T a_h
+        a = c + np.einsum("nkj,nj->nk", T, a)
+    return means, out_var
+
+
+def forecast(model, steps, variances=False):
+    """Single-model convenience wrapper around forecast_batch."""
+    means, out_var = forecast_batch([model], steps, variances=variances)
+    return (means[0], out_var[0]) if variances else means[0]
+
+
+def _psd_sqrt(matrices):
+    """Batched square roots L with L L' = M of symmetric PSD matrices (tiny negative eigenvalues clipped)."""
+    eigenvalues, eigenvectors = np.linalg.eigh(matrices)
+    return eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))[..., None, :]
+
+
+def simulate_batch(models, steps, paths, rng=None):
+    """
+    Draws `paths` future sample paths for many univariate state-space models at once,
+    starting from each model's predicted state distribution N(a, P) and adding state
+    and observation noise every step.
+
+    The system is linear, so a path is the point forecast plus the responses to its
+    shocks: y_h = mean_h + Z T^h u + sum_{j<h} Z T^(h-1-j) R eta_j + eps_h. The
+    responses Z T^h are computed once per model; every path then costs one matrix
+    product per noise source instead of a step-by-step state recursion.
+
+    Returns an array shaped (len(models), paths, steps).
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    system = stack_models(models)
+    Z, d, H = system["design"], system["obs_intercept"], system["obs_cov"]
+    T, c, a = system["transition"], system["state_intercept"], system["state"]
+    n, k = len(models), system["k_states"]
+
+    # State shocks enter through R (k x r, r is usually 1): (R chol(Q)) per model
+    r = max(model.selection.shape[1] for model in models)
+    shock_loadings = np.zeros((n, k, r))
+    for i, model in enumerate(models):
+        ki, ri = model.selection.shape
+        shock_loadings[i, :ki, :ri] = model.selection @ _psd_sqrt(model.state_cov)
+
+    # 1. Point forecasts and the observation's response to the state h steps earlier (Z T^h)
+    means = np.empty((n, steps))
+    responses = np.empty((n, steps, k))
+    response = Z
+    for h in range(steps):
+        means[:, h] = d + np.einsum("nk,nk->n", Z, a)
+        responses[:, h] = response
+        a = c + np.einsum("nkj,nj->nk", T, a)
+        response = np.einsum("nk,nkj->nj", response, T)
+
+    # 2. Toeplitz map from every step's state shocks to the later observations:
+    #    shock j (component i) moves y_h by Z T^(h-1-j) R chol(Q)[:, i] for h > j
+    shock_responses = responses @ shock_loadings  # (n, steps, r)
+    propagation = np.zeros((n, steps, r, steps))
+    for j in range(steps - 1):
+        propagation[:, j, :, j + 1:] = np.swapaxes(shock_responses[:, :steps - 1 - j], 1, 2)
+    propagation = propagation.reshape(n, steps * r, steps)
+
+    # 3. Initial-state uncertainty: Z T^h P^(1/2) u with u ~ N(0, I)
+    initial = np.swapaxes(responses @ _psd_sqrt(system["state_cov"]), 1, 2)  # (n, k, steps)
+
+    simulated = means[:, None, :] + rng.standard_normal((n, paths, k)) @ initial
+    simulated += rng.standard_normal((n, paths, steps * r)) @ propagation
+    simulated += np.sqrt(np.clip(H, 0, None))[:, None, None] * rng.standard_normal((n, paths, steps))
+    return simulated
+
+
+def forecast_from_states(model, states, steps):
+    """
+    Point forecasts of one model from many starting states at once (e.g. the filtered
+    state at every origin of a backtest). `states` is (n, k_states); returns (n, steps).
+    """
+    Z, d = model.design[0], model.obs_intercept[0]
+    T, c = model.transition, model.state_intercept
+    a = np.asarray(states, dtype=np.float64)
+
+    means = np.empty((a.shape[0], steps))
+    for h in range(steps):
+        means[:, h] = d + a @ Z
+        a = c + a @ T.T
+    return means
+
+
+def filter_observations(model, observations):
+    """
+    Runs the Kalman filter of a univariate time-invariant model over new observations
+    with its parameters fixed, starting from the model's predicted state.
+    Returns (state, state_cov, innovations, innovation_vars): the predicted state and
+    covariance for the period after the last observation, and the one-step-ahead
+    forecast errors with their variances.
+    """
+    Z, d, H = model.design[0], model.obs_intercept[0], model.obs_cov[0, 0]
+    T, c = model.transition, model.state_intercept
+    RQR = model.selection @ model.state_cov @ model.selection.T
+    a, P = model.state.copy(), model.state_cov_pred.copy()
+
+    n = len(observations)
+    innovations, innovation_vars = np.empty(n), np.empty(n)
+    for t, y in enumerate(observations):
+        # Update with y_t ...
+        F = Z @ P @ Z + H
+        v = y - d - Z @ a
+        K = P @ Z / F
+        a = a + K * v
+        P = P - np.outer(K, Z @ P)
+        innovations[t], innovation_vars[t] = v, F
+        # ... then predict t + 1
+        a = c + T @ a
+        P = T @ P @ T.T + RQR
+    return a, P, innovations, innovation_vars
@@ -0,0 +1,99 @@
+import os
+import time
+import asyncio
+from app.core.executors import run_io, ARTIFACT_IO_WORKERS
+from app.core.model_cache import model_cache
+from app.core.disk_cache import disk_cache
+from app.database.crud_forecast import get_production_model_names_async
+from app.services.registry import registry_snapshot
+from app.services.catalog import series_catalog
+
+# Preload models into the process-wide cache at startup (set to 0 to skip)
+MODEL_WARMUP_ENABLED = os.getenv("MODEL_WARMUP_ENABLED", "1") != "0"
+# Concurrent artifact downloads during warm-up; bounded by the artifact I/O pool anyway
+MODEL_WARMUP_CONCURRENCY = int(os.getenv("MODEL_WARMUP_CONCURRENCY", str(ARTIFACT_IO_WORKERS)))
+
+
+class WarmupState:
+    """Progress of the startup warm-up, as reported by /ready."""
+
+    def __init__(self):
+        self.status = "pending"  # pending -> warming -> ready
+        self.source = None       # "registry" or "storage"
+        self.started_at = None
+        self.finished_at = None
+        self.models = {}         # series_id -> {"status", "seconds"[, "error"]}
+
+    def report(self):
+        loaded = sum(1 for m in self.models.values() if m["status"] == "loaded")
+        failed = sum(1 for m in self.models.values() if m["status"] == "failed")
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round((self.finished_at or time.perf_counter()) - self.started_at, 3)
+        return {
+            "status": self.status,
+            "source": self.source,
+            "models_total": len(self.models),
+            "models_loaded": loaded,
+            "models_failed": failed,
+            "seconds": elapsed,
+            "registry": registry_snapshot.report(),
+            "catalog": series_catalog.report(),
+            "cache": model_cache.stats(),
+            "disk_cache": disk_cache.stats() if disk_cache else None,
+            "models": self.models,
+        }
+
+
+warmup_state = WarmupState()
+
+
+async def _load_one(artifact_manager, series_id, semaphore, state):
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            # Compact artifacts hold the manifest too, so this is one read per series
+            version = registry_snapshot.production_version(series_id)
+            await run_io(artifact_manager.load_model, series_id, version)
+            await run_io(artifact_manager.load_manifest, series_id, version)
+            state.models[series_id] = {"status": "loaded", "seconds": round(time.perf_counter() - started, 3)}
+        except Exception as e:
+            state.models[series_id] = {
+                "status": "failed",
+                "seconds": round(time.perf_counter() - started, 3),
+                "error": str(e),
+            }
+
+
+async def warm_models(artifact_manager, state=warmup_state, concurrency=MODEL_WARMUP_CONCURRENCY):
+    """
+    Loads every production model (from the registry, or whatever is in storage when
+    the registry is unavailable or empty) into the model cache concurrently. Failures
+    are recorded per model and never fail startup.
+    """
+    state.status = "warming"
+    state.started_at = time.perf_counter()
+    try:
+        # Production versions come from the registry snapshot (loaded here if the
+        # refresher hasn't yet)
+        if not registry_snapshot.loaded:
+            await registry_snapshot.refresh()
+        series_ids = sorted(registry_snapshot.versions) or await get_production_model_names_async()
+        state.source = "registry"
+        if not series_ids:
+            series_ids = await run_io(artifact_manager.list_series)
+            state.source = "storage"
+
+        state.models = {series_id: {"status": "loading", "seconds": None} for series_id in series_ids}
+        print(f"🔥 Warming {len(series_ids)} models from {state.source} ({artifact_manager.mode})...")
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        await asyncio.gather(*[_load_one(artifact_manager, s, semaphore, state) for s in series_ids])
+    except Exception as e:
+        print(f"⚠️ Model warm-up failed: {e}")
+    finally:
+        state.finished_at = time.perf_counter()
+        state.status = "ready"
+
+    report = state.report()
+    print(f"✅ Warm-up done: {report['models_loaded']}/{report['models_total']} models in {report['seconds']}s")
+    return report
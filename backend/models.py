@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, func, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, func, text, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import JSON
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -6,16 +6,43 @@ Base = declarative_base()
 
 class RawSeries(Base):
     __tablename__ = 'raw_series'
+    __table_args__ = (
+        # One observation per series and month; conflict target for the ingestion upsert.
+        # Covers `value` so per-series reads ordered by date are index-only scans.
+        Index('uq_raw_series_series_id_date', 'series_id', 'date', unique=True, postgresql_include=['value']),
+        Index('ix_raw_series_date_brin', 'date', postgresql_using='brin'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    series_id = Column(String, index=True, nullable=False)
+    series_id = Column(String, nullable=False)
     date = Column(DateTime, nullable=False)
     value = Column(Float, nullable=False)
     source = Column(String, default='FRED')
 
+class SeriesCatalog(Base):
+    __tablename__ = 'series_catalog'
+
+    # One row per series in raw_series, kept up to date by ingestion
+    series_id = Column(String, primary_key=True)
+    source = Column(String, nullable=True)
+    first_date = Column(DateTime, nullable=False)
+    last_date = Column(DateTime, nullable=False)
+    row_count = Column(Integer, nullable=False)
+
+    # md5 of the series' (date, value) rows after the last ingest that touched it;
+    # the /historical-data ETag is derived from it
+    last_ingest_hash = Column(String, nullable=False)
+
+    # Bumped only when an ingest actually changed the series
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
 class ModelRegistry(Base):
     __tablename__ = 'models'
-    __table_args__ = (UniqueConstraint('name', 'version', name='unique_model_version'),)
+    __table_args__ = (
+        UniqueConstraint('name', 'version', name='unique_model_version'),
+        # Only one production version per name
+        Index('uq_models_name_production', 'name', unique=True, postgresql_where=text('is_production')),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -38,8 +65,33 @@ class ModelRegistry(Base):
     metrics_json = Column(JSON, nullable=True)
     
     # Deployment Status
-    # Only one model per 'name' should be True at a time
+    # Only one model per 'name' can be True at a time (uq_models_name_production)
     is_production = Column(Boolean, default=False)
     
     # Audit trail
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Bumped by a trigger on every update (promotion/rollback); the API polls
+    # COUNT(*) + MAX(updated_at) to know when to reload its registry snapshot
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+class PrecomputedForecast(Base):
+    __tablename__ = 'precomputed_forecasts'
+    __table_args__ = (
+        UniqueConstraint('series_id', 'model_version', name='unique_forecast_version'),
+        Index('ix_precomputed_forecasts_series_id_created_at', 'series_id', 'created_at'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    series_id = Column(String, nullable=False)
+
+    # Matches ModelRegistry.version of the model that produced the vector
+    model_version = Column(String, nullable=False)
+
+    # First forecasted month (the month after train_end_date)
+    start_date = Column(DateTime, nullable=False)
+
+    # Number of monthly steps stored in values_json; any horizon <= this is a slice
+    horizon = Column(Integer, nullable=False)
+    values_json = Column(JSON, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,163 @@
+"""
+Benchmark: raw_series layout before and after the covering/BRIN index migration.
+
+Builds two synthetic copies of raw_series in a scratch schema on the database in
+DATABASE_URL (PostgreSQL only):
+
+  * before - the 86c4658336f6 layout: serial id, indexes on id and series_id only
+  * after  - the c7e2b91f4d08 layout: unique (series_id, date) INCLUDE (value) + BRIN(date)
+
+and times the queries the application runs against them:
+
+  * history   - get_historical_data (one series ordered by date)
+  * training  - train_all_models data load (same query through pandas.read_sql)
+  * range     - /historical-data with start/end
+  * marker    - the ETag fingerprint (count / max(date) / sum(value))
+
+    DATABASE_URL=postgresql://... python benchmarks/raw_series_schema.py --series 1000 --months 1000
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+SCHEMA = "bench_raw_series"
+
+LAYOUTS = {
+    "before": [
+        "CREATE TABLE {table} (id SERIAL PRIMARY KEY, series_id VARCHAR NOT NULL, "
+        "date TIMESTAMP NOT NULL, value DOUBLE PRECISION NOT NULL, source VARCHAR)",
+        "CREATE INDEX ON {table} (id)",
+        "CREATE INDEX ON {table} (series_id)",
+    ],
+    "after": [
+        "CREATE TABLE {table} (id SERIAL PRIMARY KEY, series_id VARCHAR NOT NULL, "
+        "date TIMESTAMP NOT NULL, value DOUBLE PRECISION NOT NULL, source VARCHAR)",
+        "CREATE INDEX ON {table} (id)",
+        "CREATE UNIQUE INDEX ON {table} (series_id, date) INCLUDE (value)",
+        "CREATE INDEX ON {table} USING brin (date)",
+    ],
+}
+
+QUERIES = {
+    "history": "SELECT date, value FROM {table} WHERE series_id = :series_id ORDER BY date",
+    "range": "SELECT date, value FROM {table} WHERE series_id = :series_id "
+             "AND date >= '2000-01-01' AND date <= '2010-12-01' ORDER BY date",
+    "marker": "SELECT COUNT(*), MAX(date), SUM(value) FROM {table} WHERE series_id = :series_id",
+}
+
+
+def build_table(conn, layout, series, months):
+    table = f"{SCHEMA}.raw_series_{layout}"
+    for statement in LAYOUTS[layout]:
+        conn.execute(text(statement.format(table=table)))
+    # Interleave series by date, as monthly ingestion of many series does
+    conn.execute(text(f"""
+        INSERT INTO {table} (series_id, date, value, source)
+        SELECT 'S' || lpad(s::text, 6, '0'),
+               timestamp '1940-01-01' + (m || ' months')::interval,
+               100 + random() * 10,
+               'SYNTHETIC'
+        FROM generate_series(0, :months - 1) AS m, generate_series(0, :series - 1) AS s
+        ORDER BY m, s
+    """), {"series": series, "months": months})
+    conn.execute(text(f"VACUUM ANALYZE {table}"))
+    size = conn.execute(text(f"SELECT pg_size_pretty(pg_total_relation_size('{table}'))")).scalar()
+    return table, size
+
+
+def time_query(engine, sql, series_ids, repeat, use_pandas=False):
+    timings = []
+    with engine.connect() as conn:
+        for _ in range(repeat):
+            params = {"series_id": random.choice(series_ids)}
+            started = time.perf_counter()
+            if use_pandas:
+                pd.read_sql(text(sql), conn, params=params)
+            else:
+                conn.execute(text(sql), params).all()
+            timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+    }
+
+
+def plan_summary(engine, sql, series_id):
+    with engine.connect() as conn:
+        plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), {"series_id": series_id}).scalar()
+    node = plan[0]["Plan"] if isinstance(plan, list) else json.loads(plan)[0]["Plan"]
+    names = []
+    while node:
+        names.append(node["Node Type"])
+        node = node.get("Plans", [None])[0]
+    return " > ".join(names)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark raw_series layouts on synthetic data.")
+    parser.add_argument("--series", type=int, default=1000)
+    parser.add_argument("--months", type=int, default=1000, help="Rows per series (series x months = table size).")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--output", help="Write results as JSON to this path.")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch schema afterwards.")
+    args = parser.parse_args(argv)
+
+    db_url = os.getenv("DATABASE_URL_ALEMBIC") or os.getenv("DATABASE_URL")
+    if not db_url or not db_url.startswith(("postgres://", "postgresql")):
+        sys.exit("DATABASE_URL must point at a PostgreSQL database.")
+    engine = create_engine(db_url.replace("postgres://", "postgresql://", 1))
+    series_ids = [f"S{i:06d}" for i in range(args.series)]
+
+    results = {"rows": args.series * args.months, "layouts": {}}
+    admin = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+    try:
+        admin.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        admin.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        for layout in LAYOUTS:
+            print(f"🏗️  Building '{layout}' table with {results['rows']:,} rows...")
+            started = time.perf_counter()
+            table, size = build_table(admin, layout, args.series, args.months)
+            layout_results = {"build_seconds": round(time.perf_counter() - started, 2), "size": size, "queries": {}}
+
+            for name, sql in QUERIES.items():
+                sql = sql.format(table=table)
+                layout_results["queries"][name] = {
+                    **time_query(engine, sql, series_ids, args.repeat),
+                    "plan": plan_summary(engine, sql, series_ids[0]),
+                }
+            layout_results["queries"]["training"] = time_query(
+                engine, QUERIES["history"].format(table=table), series_ids, args.repeat, use_pandas=True
+            )
+            results["layouts"][layout] = layout_results
+    finally:
+        if not args.keep:
+            admin.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        admin.close()
+
+    print(f"\n📊 {results['rows']:,} rows, {args.repeat} runs per query")
+    for name in ["history", "training", "range", "marker"]:
+        before = results["layouts"]["before"]["queries"][name]
+        after = results["layouts"]["after"]["queries"][name]
+        print(f"   {name:<9} p50 {before['p50_ms']:8.2f} ms -> {after['p50_ms']:8.2f} ms   "
+              f"p95 {before['p95_ms']:8.2f} ms -> {after['p95_ms']:8.2f} ms")
+        if "plan" in after:
+            print(f"             plan: {before['plan']}  ->  {after['plan']}")
+    for layout, data in results["layouts"].items():
+        print(f"   {layout:<9} table+indexes {data['size']}, built in {data['build_seconds']}s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
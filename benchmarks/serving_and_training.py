@@ -0,0 +1,372 @@
+"""
+Benchmark: end-to-end serving and training paths on synthetic data.
+
+Runs the real FastAPI app in-process against local stand-ins and reports
+p50/p95/p99 latency and throughput per endpoint scenario, plus wall time for
+ingestion and training:
+
+  * ingest          - ingest_data.save_to_db (first load, then an unchanged re-run)
+  * training        - train_all_models.main over the synthetic series
+  * forecast_hit    - /forecast served from the Redis vector (random horizons, so
+                      the first request per horizon also renders the cached body)
+  * forecast_body   - /forecast served from the cached, pre-serialized response body
+  * forecast_miss   - /forecast after the Redis keys are dropped (Postgres vector)
+  * forecast_model  - /forecast beyond MAX_FORECAST_HORIZON with a cold model cache
+                      (artifact download + deserialize + forecast)
+  * historical_data - /historical-data/{id}, full history
+  * materials       - /materials
+
+Stand-ins:
+  * Postgres - the database in DATABASE_URL (required: the API uses asyncpg and
+               ingestion uses COPY). Synthetic series are named BENCH_xxxx and are
+               deleted afterwards unless --keep is given.
+  * Redis    - an in-process fakeredis server, or --redis-url for a real one
+  * Storage  - a temporary ml/models directory (LOCAL), or with --storage S3 an
+               in-process moto S3 server that ArtifactManager reaches through
+               AWS_ENDPOINT_URL_S3
+
+    pip install fakeredis "moto[server]" httpx
+    DATABASE_URL=postgresql://... python benchmarks/serving_and_training.py --series 20 --output bench.json
+    DATABASE_URL=postgresql://... python benchmarks/serving_and_training.py --baseline bench.json
+"""
+import os
+import sys
+import io
+import json
+import time
+import socket
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+import threading
+import statistics
+import subprocess
+import contextlib
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SERIES_PREFIX = "BENCH_"
+BUCKET = "bench-artifacts"
+
+
+# --- Stand-ins ---
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fake_redis():
+    """Starts a fakeredis TCP server in a daemon thread. Returns its URL."""
+    from fakeredis import TcpFakeServer
+    port = _free_port()
+    server = TcpFakeServer(("127.0.0.1", port), server_type="redis")
+    server.daemon_threads = True  # open client connections must not block interpreter exit
+
+    class Handler(server.RequestHandlerClass):
+        # Replies are written one by one; with Nagle on, a pipeline's second reply
+        # waits for the client's delayed ACK (~40 ms), which real Redis never does
+        disable_nagle_algorithm = True
+
+    server.RequestHandlerClass = Handler
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"redis://127.0.0.1:{port}/0"
+
+
+def start_fake_s3():
+    """Starts a moto S3 server and points boto3 (and so ArtifactManager) at it."""
+    from moto.server import ThreadedMotoServer
+    import boto3
+    port = _free_port()
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=port)
+    server.start()
+    os.environ.update({
+        "AWS_ENDPOINT_URL_S3": f"http://127.0.0.1:{port}",
+        "AWS_ACCESS_KEY_ID": "bench",
+        "AWS_SECRET_ACCESS_KEY": "bench",
+        "AWS_REGION": "us-east-1",
+        "S3_BUCKET_NAME": BUCKET,
+        "ARTIFACT_STORAGE_MODE": "S3",
+    })
+    boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=BUCKET)
+    return server
+
+
+def synthetic_series(count, months, seed=0):
+    """Monthly trend + yearly seasonality + noise for `count` series, as raw_series rows."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2025-01-01", periods=months, freq="MS") - pd.DateOffset(months=months)
+    t = np.arange(months)
+    frames = []
+    for i in range(count):
+        values = (
+            100 + rng.uniform(0, 50)
+            + rng.uniform(-0.05, 0.2) * t
+            + rng.uniform(1, 5) * np.sin(2 * np.pi * t / 12 + rng.uniform(0, 2 * np.pi))
+            + rng.normal(0, 1, months).cumsum() * 0.3
+        )
+        frames.append(pd.DataFrame({
+            "series_id": f"{SERIES_PREFIX}{i:04d}",
+            "date": dates,
+            "value": values.round(3),
+            "source": "SYNTHETIC",
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+# --- Measurement ---
+
+def summarize(latencies, wall_seconds, errors=0):
+    latencies = sorted(latencies)
+
+    def percentile(q):
+        return latencies[min(len(latencies) - 1, int(round(q * (len(latencies) - 1))))] * 1000
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(percentile(0.50), 3),
+        "p95_ms": round(percentile(0.95), 3),
+        "p99_ms": round(percentile(0.99), 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "throughput_rps": round(len(latencies) / wall_seconds, 1),
+    }
+
+
+async def run_load(client, make_request, total, concurrency, before_round=None):
+    """
+    Issues `total` requests, `concurrency` at a time. `make_request(i)` returns
+    (method, url, body). `before_round(batch)` runs untimed before each round.
+    """
+    latencies, errors = [], 0
+
+    async def one(i):
+        nonlocal errors
+        method, url, body = make_request(i)
+        started = time.perf_counter()
+        response = await client.request(method, url, json=body)
+        latencies.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            errors += 1
+
+    wall = 0.0
+    for offset in range(0, total, concurrency):
+        batch = list(range(offset, min(total, offset + concurrency)))
+        if before_round:
+            await before_round(batch)
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in batch))
+        wall += time.perf_counter() - started
+    return summarize(latencies, wall, errors)
+
+
+async def bench_serving(series_ids, args):
+    import httpx
+    from app.main import app
+    from app.core import cache
+    from app.core.model_cache import model_cache
+    from app.services.forecasting import MAX_FORECAST_HORIZON
+
+    rng = random.Random(1)
+    results = {}
+
+    async def drop_redis_keys(batch):
+        keys = []
+        for i in batch:
+            series_id = series_ids[i % len(series_ids)]
+            keys.append(cache.forecast_version_key(series_id))
+            keys.extend(await cache.async_redis_client.keys(f"forecast:{series_id}:*"))
+            keys.extend(await cache.async_redis_client.keys(f"forecast-body:{series_id}:*"))
+        if keys:
+            await cache.async_redis_client.delete(*keys)
+
+    async def cold(batch):
+        await drop_redis_keys(batch)
+        model_cache.clear()
+
+    def forecast(horizon_range):
+        # Distinct series per round so every request in a miss round is a genuine miss
+        return lambda i: ("GET", f"/forecast?material_id={series_ids[i % len(series_ids)]}"
+                                 f"&horizon={rng.randint(*horizon_range)}", None)
+
+    scenarios = [
+        ("forecast_hit", forecast((1, MAX_FORECAST_HORIZON)), None),
+        ("forecast_body", forecast((1, 1)), None),
+        ("forecast_miss", forecast((1, MAX_FORECAST_HORIZON)), drop_redis_keys),
+        ("forecast_model", forecast((MAX_FORECAST_HORIZON + 1, MAX_FORECAST_HORIZON + 24)), cold),
+        ("historical_data", lambda i: ("GET", f"/historical-data/{rng.choice(series_ids)}", None), None),
+        ("materials", lambda i: ("GET", "/materials", None), None),
+    ]
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            # Make sure every series has a cached vector before the hit scenario
+            await run_load(client, forecast((1, 1)), len(series_ids), args.concurrency)
+            for name, make_request, before_round in scenarios:
+                concurrency = min(args.concurrency, len(series_ids)) if before_round else args.concurrency
+                results[name] = await run_load(client, make_request, args.requests, concurrency, before_round)
+    return results
+
+
+# --- Orchestration ---
+
+def quiet(verbose):
+    """Hides the scripts' and the API's progress output unless --verbose."""
+    return contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+
+
+def git_sha():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=PROJECT_ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def cleanup(engine, redis_url):
+    from sqlalchemy import text
+    with engine.begin() as conn:
+        for table, column in [("raw_series", "series_id"), ("series_catalog", "series_id"),
+                              ("precomputed_forecasts", "series_id"), ("models", "name")]:
+            conn.execute(text(f"DELETE FROM {table} WHERE {column} LIKE :prefix"), {"prefix": f"{SERIES_PREFIX}%"})
+    import redis
+    client = redis.from_url(redis_url)
+    for pattern in [f"forecast:{SERIES_PREFIX}*", f"forecast-version:{SERIES_PREFIX}*", f"forecast-body:{SERIES_PREFIX}*"]:
+        keys = list(client.scan_iter(pattern))
+        if keys:
+            client.delete(*keys)
+
+
+def print_comparison(results, baseline):
+    print(f"\n📈 Compared with baseline {baseline.get('git_sha', '?')[:10]}:")
+    for name, data in results["serving"].items():
+        old = baseline.get("serving", {}).get(name)
+        if old:
+            print(f"   {name:<16} p50 {old['p50_ms']:8.2f} -> {data['p50_ms']:8.2f} ms   "
+                  f"p99 {old['p99_ms']:8.2f} -> {data['p99_ms']:8.2f} ms   "
+                  f"{old['throughput_rps']:8.1f} -> {data['throughput_rps']:8.1f} req/s")
+    for stage in ["ingest", "training"]:
+        for key, value in results.get(stage, {}).items():
+            old = baseline.get(stage, {}).get(key)
+            if isinstance(value, (int, float)) and isinstance(old, (int, float)):
+                print(f"   {stage}.{key:<22} {old:10.2f} -> {value:10.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark serving and training on synthetic data.")
+    parser.add_argument("--series", type=int, default=20, help="Number of synthetic series.")
+    parser.add_argument("--months", type=int, default=240, help="Observations per series.")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per serving scenario.")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=1, help="train_all_models --workers.")
+    parser.add_argument("--storage", choices=["LOCAL", "S3"], default="LOCAL")
+    parser.add_argument("--redis-url", help="Use this Redis instead of an in-process fakeredis server.")
+    parser.add_argument("--output", help="Write results as JSON to this path.")
+    parser.add_argument("--baseline", help="Print a comparison with a previous --output file.")
+    parser.add_argument("--keep", action="store_true", help="Keep the synthetic series afterwards.")
+    parser.add_argument("--verbose", action="store_true", help="Show ingestion/training output.")
+    args = parser.parse_args(argv)
+
+    db_url = os.getenv("DATABASE_URL") or os.getenv("DATABASE_URL_ALEMBIC")
+    if not db_url or not db_url.startswith(("postgres://", "postgresql")):
+        sys.exit("DATABASE_URL must point at a PostgreSQL database.")
+    os.environ["DATABASE_URL"] = db_url
+    if not args.verbose:
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)  # moto's request log
+
+    # 1. Stand-ins; the app reads its configuration at import time, so this comes first
+    redis_url = args.redis_url or start_fake_redis()
+    os.environ["REDIS_URL"] = redis_url
+    os.environ["MODEL_WARMUP_ENABLED"] = "0"  # cold paths are measured explicitly
+    s3_server = start_fake_s3() if args.storage == "S3" else None
+    # LOCAL artifacts go to ./ml/models: work in a scratch directory
+    workdir = tempfile.TemporaryDirectory(prefix="mfe-bench-")
+    os.makedirs(os.path.join(workdir.name, "ml", "models"))
+    os.chdir(workdir.name)
+
+    sys.path.insert(0, str(PROJECT_ROOT / "ml" / "scripts"))
+    sys.path.insert(0, str(PROJECT_ROOT / "backend"))
+    with quiet(args.verbose):
+        import ingest_data
+        import train_all_models
+        from models import Base
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+    engine = train_all_models.engine
+    Base.metadata.create_all(engine)
+
+    series_ids = [f"{SERIES_PREFIX}{i:04d}" for i in range(args.series)]
+    results = {
+        "git_sha": git_sha(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+    }
+
+    try:
+        cleanup(engine, redis_url)
+
+        # 2. Ingestion: a first load and an unchanged re-run of the same rows
+        df = synthetic_series(args.series, args.months)
+        print(f"🏗️  Ingesting {len(df):,} rows for {args.series} series...")
+        timings = {}
+        for run in ["first_load_seconds", "unchanged_rerun_seconds"]:
+            started = time.perf_counter()
+            with quiet(args.verbose):
+                ingest_data.save_to_db(df, "raw_series", engine)
+            timings[run] = round(time.perf_counter() - started, 3)
+        results["ingest"] = {"rows": len(df), **timings}
+
+        # 3. Training (artifacts, registry rows, precomputed vectors, Redis publish)
+        print(f"🏋️  Training {args.series} series with {args.workers} worker(s)...")
+        started = time.perf_counter()
+        with quiet(args.verbose):
+            summary = train_all_models.main(["--series", *series_ids, "--workers", str(args.workers)]) or {}
+        wall = time.perf_counter() - started
+        statuses = [status for status, _ in summary.values()]
+        results["training"] = {
+            "wall_seconds": round(wall, 3),
+            "per_series_mean_seconds": round(statistics.fmean(s for _, s in summary.values()), 3) if summary else None,
+            "ok": statuses.count("ok"),
+            "failed": len(statuses) - statuses.count("ok"),
+        }
+
+        # 4. Serving
+        print(f"🚀 Serving: {args.requests} requests per scenario, concurrency {args.concurrency}...")
+        with quiet(args.verbose):
+            results["serving"] = asyncio.run(bench_serving(series_ids, args))
+    finally:
+        if not args.keep:
+            cleanup(engine, redis_url)
+        if s3_server:
+            s3_server.stop()
+        os.chdir(PROJECT_ROOT)
+        workdir.cleanup()
+
+    print(f"\n📊 {args.series} series x {args.months} months, storage {args.storage}")
+    print(f"   ingest     first load {results['ingest']['first_load_seconds']:.2f}s, "
+          f"unchanged re-run {results['ingest']['unchanged_rerun_seconds']:.2f}s ({results['ingest']['rows']:,} rows)")
+    print(f"   training   {results['training']['wall_seconds']:.2f}s wall, "
+          f"{results['training']['ok']} ok / {results['training']['failed']} failed")
+    for name, data in results["serving"].items():
+        print(f"   {name:<16} p50 {data['p50_ms']:8.2f} ms  p95 {data['p95_ms']:8.2f} ms  "
+              f"p99 {data['p99_ms']:8.2f} ms  {data['throughput_rps']:8.1f} req/s  ({data['errors']} errors)")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            print_comparison(results, json.load(f))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
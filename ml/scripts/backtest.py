@@ -0,0 +1,88 @@
+"""
+Rolling-origin backtesting for train_all_models.py.
+
+Instead of refitting a model per fold, the parameters are estimated once on the
+data before the first origin. The state-space filter is then extended over the
+test window with those parameters fixed, so the filtered state at every later
+origin comes from a single pass. Forecasts from all origins and all horizons are
+produced together by app.services.state_space and scored in one vectorized step.
+"""
+import time
+import warnings
+import numpy as np
+from app.core.model_artifact import CompactStateSpaceModel
+from app.services import state_space
+from order_search import SEASONAL_PERIOD, build_model, warm_start_params
+
+BACKTEST_MONTHS = 36   # origins: each of the last 36 months
+BACKTEST_HORIZON = 12  # months forecast from every origin
+
+
+def smape_cells(actual, predicted):
+    """Per-cell sMAPE (%): 0 where actual and predicted are both 0, NaN where no actual exists yet."""
+    actual, predicted = np.asarray(actual, dtype=np.float64), np.asarray(predicted, dtype=np.float64)
+    denominator = np.abs(actual) + np.abs(predicted)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cells = 200 * np.abs(predicted - actual) / denominator
+    return np.where(denominator == 0, 0.0, cells)
+
+
+def smape(actual, predicted):
+    """
+    Symmetric Mean Absolute Percentage Error (sMAPE) of a forecast.
+    Range: 0% to 200% (Lower is better)
+    """
+    return float(np.mean(smape_cells(actual, predicted)))
+
+
+def _errors(actual, predicted):
+    """Per-cell sMAPE (%) and absolute error; NaN where no actual exists yet."""
+    return smape_cells(actual, predicted), np.abs(predicted - actual)
+
+
+def backtest(series, order, seasonal_order, params=None, test_months=BACKTEST_MONTHS, horizon=BACKTEST_HORIZON):
+    """
+    Evaluates 1..`horizon`-step forecasts from each of the last `test_months` origins.
+    `params` ({name: value}, e.g. from the full-history fit) only warm-starts the single
+    fit on the pre-test data. Returns a metrics dict, or None if the series is too short.
+    """
+    started = time.perf_counter()
+    values = np.asarray(series, dtype=np.float64)
+    first_origin = len(values) - test_months
+    if test_months < 1 or first_origin < 3 * SEASONAL_PERIOD:
+        return None
+
+    # 1. One fit on everything before the first origin
+    model = build_model(series.iloc[:first_origin], order, seasonal_order)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        results = model.fit(start_params=warm_start_params(model, params), disp=False)
+
+    # 2. Filter the test window with fixed parameters: predicted_state[:, i] is the
+    #    state for origin first_origin + i given all data before it
+    extended = results.extend(series.iloc[first_origin:])
+    states = extended.predicted_state[:, :test_months].T
+
+    # 3. Forecast every origin and horizon in one batched pass
+    predicted = state_space.forecast_from_states(CompactStateSpaceModel.from_results(results), states, horizon)
+
+    # 4. Actuals aligned with (origin, horizon); NaN past the end of the series
+    padded = np.concatenate([values, np.full(horizon, np.nan)])
+    index = first_origin + np.arange(test_months)[:, None] + np.arange(horizon)[None, :]
+    cell_smape, abs_error = _errors(padded[index], predicted)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        smape_by_horizon = np.nanmean(cell_smape, axis=0)
+        mae_by_horizon = np.nanmean(abs_error, axis=0)
+
+    return {
+        "origins": test_months,
+        "horizon": horizon,
+        "first_origin": series.index[first_origin].strftime('%Y-%m-%d'),
+        "sMAPE": round(float(np.nanmean(cell_smape)), 4),
+        "MAE": round(float(np.nanmean(abs_error)), 4),
+        "sMAPE_by_horizon": [round(float(v), 4) for v in smape_by_horizon],
+        "MAE_by_horizon": [round(float(v), 4) for v in mae_by_horizon],
+        "seconds": round(time.perf_counter() - started, 3),
+    }
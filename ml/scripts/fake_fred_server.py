@@ -0,0 +1,139 @@
+"""
+Local stand-in for the FRED observations endpoint.
+
+Serves deterministic synthetic monthly series for any series_id so the ingestion
+fetcher can be exercised and benchmarked offline:
+
+    python ml/scripts/fake_fred_server.py --port 8765
+    FRED_API_URL=http://127.0.0.1:8765/fred/series/observations python ml/scripts/ingest_data.py
+
+    # Fetch 500 synthetic series through fetch_all_series and report throughput
+    python ml/scripts/fake_fred_server.py --benchmark 500 --workers 16
+"""
+import json
+import time
+import random
+import zlib
+import argparse
+import threading
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+OBSERVATIONS_PATH = "/fred/series/observations"
+
+
+def synthetic_observations(series_id, length, start_year=1970):
+    """Deterministic random-walk-with-seasonality observations in FRED's JSON shape."""
+    rng = np.random.default_rng(zlib.crc32(series_id.encode("utf-8")))
+    months = np.arange(length)
+    values = 100 + np.cumsum(rng.normal(0, 1, length)) + 5 * np.sin(2 * np.pi * months / 12)
+    observations = []
+    for i, value in enumerate(values):
+        year, month = start_year + i // 12, i % 12 + 1
+        # FRED reports missing observations as "."
+        raw = "." if rng.random() < 0.01 else f"{value:.3f}"
+        observations.append({"date": date(year, month, 1).isoformat(), "value": raw})
+    return observations
+
+
+def make_handler(length, error_rate, latency_ms):
+    class FakeFredHandler(BaseHTTPRequestHandler):
+        # HTTP/1.1 so clients can keep connections alive
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != OBSERVATIONS_PATH:
+                return self._send(404, {"error_message": "Not found"})
+
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+            series_id = params.get("series_id")
+            if not series_id:
+                return self._send(400, {"error_message": "Bad Request. Variable series_id is not set."})
+
+            if latency_ms:
+                time.sleep(latency_ms / 1000.0)
+            if error_rate and random.random() < error_rate:
+                # Exercise the client's backoff path
+                return self._send(random.choice([429, 503]), {"error_message": "Too Many Requests"}, retry_after=0)
+
+            observations = synthetic_observations(series_id, length)
+            start = params.get("observation_start")
+            if start:
+                observations = [obs for obs in observations if obs["date"] >= start]
+            self._send(200, {"count": len(observations), "observations": observations})
+
+        def _send(self, status, payload, retry_after=None):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if retry_after is not None:
+                self.send_header("Retry-After", str(retry_after))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FakeFredHandler
+
+
+def start_fake_fred_server(host="127.0.0.1", port=0, length=600, error_rate=0.0, latency_ms=0):
+    """Starts the server on a daemon thread. Returns (server, observations_url)."""
+    server = ThreadingHTTPServer((host, port), make_handler(length, error_rate, latency_ms))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    bound_host, bound_port = server.server_address[:2]
+    return server, f"http://{bound_host}:{bound_port}{OBSERVATIONS_PATH}"
+
+
+def run_benchmark(series_count, workers, length, error_rate, latency_ms):
+    import ingest_data
+
+    server, url = start_fake_fred_server(length=length, error_rate=error_rate, latency_ms=latency_ms)
+    ingest_data.FRED_API_URL = url
+    series_map = {f"SYN{i:05d}": f"SYNTHETIC_{i:05d}" for i in range(series_count)}
+    try:
+        started = time.perf_counter()
+        # No rate limit against the local server: measure the client itself
+        frames, errors = ingest_data.fetch_all_series(series_map, "fake-key", max_workers=workers, requests_per_minute=0)
+        elapsed = time.perf_counter() - started
+    finally:
+        server.shutdown()
+
+    rows = sum(len(df) for df in frames.values())
+    print(f"\n📊 Fetched {len(frames)}/{series_count} series ({rows} rows) in {elapsed:.2f}s "
+          f"with {workers} workers: {len(frames) / elapsed:.1f} series/s, {rows / elapsed:,.0f} rows/s")
+    if errors:
+        print(f"⚠️  {len(errors)} series failed, e.g. {next(iter(errors.values()))}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local fake FRED API for offline ingestion tests and benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--length", type=int, default=600, help="Observations per synthetic series.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429/503.")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Artificial per-request latency.")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="Fetch N synthetic series and report throughput.")
+    parser.add_argument("--workers", type=int, default=8, help="Fetcher threads used by --benchmark.")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        run_benchmark(args.benchmark, args.workers, args.length, args.error_rate, args.latency_ms)
+        return
+
+    server, url = start_fake_fred_server(args.host, args.port, args.length, args.error_rate, args.latency_ms)
+    print(f"🏦 Fake FRED serving {url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
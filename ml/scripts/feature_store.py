@@ -0,0 +1,295 @@
+"""
+Versioned columnar feature store for raw_series.
+
+Lag, difference and rolling features are computed for all series at once with
+group-wise vectorized pandas operations and stored as Arrow IPC files, partitioned
+by series (Hive-style, so pyarrow.dataset can read the whole store too):
+
+    FEATURE_STORE_DIR/v{FEATURE_SET_VERSION}/series_id={id}/part-{seq}_{first}_{last}.arrow
+
+Every ingest appends one part per series holding only the new months; a part that
+overlaps re-fetched or revised months is truncated first. Files are uncompressed,
+so reads are memory-mapped and zero-copy, and part names carry their month range,
+so a date-range read only opens the parts it needs.
+
+Usage:
+    python ml/scripts/feature_store.py --rebuild [--series PPI_STEEL ...]
+"""
+import os
+import re
+import argparse
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pathlib import Path
+from sqlalchemy import create_engine, text, bindparam
+from dotenv import load_dotenv
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+FEATURE_STORE_DIR = Path(os.getenv("FEATURE_STORE_DIR", PROJECT_ROOT / "ml" / "data" / "features"))
+
+# Bump when the feature definitions change: a new version is a new directory to rebuild
+FEATURE_SET_VERSION = 1
+DIFF_LAGS = (1, 3, 6, 12)       # as in 03_feature_engineering.ipynb
+ROLLING_WINDOWS = (3, 12)       # rolling mean/std of the monthly difference
+YOY_PERIODS = 12
+# Months of history a new month's features depend on
+LOOKBACK_MONTHS = 1 + max(max(DIFF_LAGS), max(ROLLING_WINDOWS), YOY_PERIODS)
+# Merge a series' parts into one once it has more than this
+MAX_PARTS = 24
+
+FEATURE_COLUMNS = (
+    ["value", "value_diff"]
+    + [f"value_diff_lag_{lag}" for lag in DIFF_LAGS]
+    + [f"value_diff_{stat}_{window}" for window in ROLLING_WINDOWS for stat in ("mean", "std")]
+    + ["value_yoy"]
+)
+
+_PART_NAME = re.compile(r"part-(\d+)_(\d{6})_(\d{6})\.arrow$")
+
+
+# --- Feature computation ---
+
+def regularize(df):
+    """One row per series and month start, gaps forward-filled (as training does)."""
+    monthly = (
+        df.set_index(pd.to_datetime(df["date"]))
+        .groupby("series_id")["value"]
+        .resample("MS").last()
+    )
+    monthly = monthly.groupby(level="series_id").ffill()
+    return monthly.reset_index()
+
+
+def build_features(df):
+    """
+    Computes FEATURE_COLUMNS for every series in a regularized (series_id, date,
+    value) frame. All operations are group-wise, so series never leak into each other.
+    """
+    df = df.sort_values(["series_id", "date"], ignore_index=True)
+    values = df.groupby("series_id", sort=False)["value"]
+    df["value_diff"] = values.diff()
+
+    diffs = df.groupby("series_id", sort=False)["value_diff"]
+    for lag in DIFF_LAGS:
+        df[f"value_diff_lag_{lag}"] = diffs.shift(lag)
+    for window in ROLLING_WINDOWS:
+        rolling = diffs.rolling(window)
+        df[f"value_diff_mean_{window}"] = rolling.mean().reset_index(level=0, drop=True)
+        df[f"value_diff_std_{window}"] = rolling.std().reset_index(level=0, drop=True)
+    df["value_yoy"] = values.pct_change(YOY_PERIODS)
+    return df[["series_id", "date", *FEATURE_COLUMNS]]
+
+
+# --- Storage layout ---
+
+def _version_dir(root=None):
+    return Path(root or FEATURE_STORE_DIR) / f"v{FEATURE_SET_VERSION}"
+
+
+def _partition_dir(series_id, root=None):
+    return _version_dir(root) / f"series_id={series_id}"
+
+
+def _parts(series_id, root=None):
+    """[(seq, first_month, last_month, path)] of a series, oldest first."""
+    directory = _partition_dir(series_id, root)
+    if not directory.is_dir():
+        return []
+    parts = []
+    for path in directory.iterdir():
+        match = _PART_NAME.match(path.name)
+        if match:
+            seq, first, last = match.groups()
+            parts.append((int(seq), pd.Timestamp(f"{first}01"), pd.Timestamp(f"{last}01"), path))
+    return sorted(parts)
+
+
+def _write_part(series_id, seq, frame, root=None):
+    """Writes one uncompressed Arrow IPC file atomically (temp file + rename)."""
+    directory = _partition_dir(series_id, root)
+    directory.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pandas(frame[["date", *FEATURE_COLUMNS]], preserve_index=False)
+    first, last = frame["date"].iloc[0], frame["date"].iloc[-1]
+    path = directory / f"part-{seq:06d}_{first:%Y%m}_{last:%Y%m}.arrow"
+    tmp = path.with_suffix(".tmp")
+    with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, path)
+    return path
+
+
+def _read_part(path, columns=None):
+    # Zero-copy: the table's buffers point into the memory map
+    with pa.memory_map(str(path), "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.select(["date", *columns]) if columns else table
+
+
+# --- Reading ---
+
+def read_table(series_id, columns=None, start=None, end=None, root=None):
+    """
+    Memory-mapped read of one series as a pyarrow Table with `date` plus `columns`
+    (default: all), limited to start <= date <= end. Returns None if it isn't stored.
+    """
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    parts = [
+        path for _, first, last, path in _parts(series_id, root)
+        if (start is None or last >= start.replace(day=1)) and (end is None or first <= end)
+    ]
+    if not parts:
+        return None
+
+    table = pa.concat_tables([_read_part(path, columns) for path in parts])
+    if start is not None:
+        table = table.filter(pc.greater_equal(table["date"], pa.scalar(start.to_datetime64(), table.schema.field("date").type)))
+    if end is not None:
+        table = table.filter(pc.less_equal(table["date"], pa.scalar(end.to_datetime64(), table.schema.field("date").type)))
+    return table
+
+
+def load_features(series_id, columns=None, start=None, end=None, root=None):
+    """read_table as a date-indexed monthly DataFrame, or None if the series isn't stored."""
+    table = read_table(series_id, columns, start, end, root)
+    if table is None:
+        return None
+    df = table.to_pandas().set_index("date")
+    df.index.freq = "MS"
+    return df
+
+
+def stored_state(series_id, root=None):
+    """(last stored month, newest part's mtime) of a series, or None if it isn't stored."""
+    parts = _parts(series_id, root)
+    if not parts:
+        return None
+    return parts[-1][2], max(path.stat().st_mtime for _, _, _, path in parts)
+
+
+def stored_series(root=None):
+    directory = _version_dir(root)
+    if not directory.is_dir():
+        return []
+    return sorted(path.name.split("=", 1)[1] for path in directory.iterdir() if path.name.startswith("series_id="))
+
+
+# --- Writing ---
+
+def _replace_series(series_id, frame, root=None):
+    """Replaces a series' partition with a single part."""
+    old = _parts(series_id, root)
+    seq = old[-1][0] + 1 if old else 0
+    _write_part(series_id, seq, frame, root)
+    for _, _, _, path in old:
+        path.unlink()
+
+
+def rebuild(engine, series_ids=None, root=None):
+    """Recomputes the features of `series_ids` (default: all of raw_series) from SQL in one pass."""
+    query = "SELECT series_id, date, value FROM raw_series"
+    params = {}
+    if series_ids:
+        query = text(query + " WHERE series_id IN :series_ids").bindparams(bindparam("series_ids", expanding=True))
+        params = {"series_ids": list(series_ids)}
+    else:
+        query = text(query)
+    with engine.connect() as conn:
+        raw = pd.read_sql(query, conn, params=params)
+    if raw.empty:
+        return []
+
+    features = build_features(regularize(raw))
+    for series_id, frame in features.groupby("series_id", sort=False):
+        _replace_series(series_id, frame.reset_index(drop=True), root)
+    return sorted(features["series_id"].unique())
+
+
+def append(engine, rows, root=None):
+    """
+    Post-ingest hook: `rows` are the (series_id, date, value) rows just written to
+    raw_series. Features are computed for those months only (with LOOKBACK_MONTHS of
+    stored history for the lags), parts overlapping them are truncated, and one new
+    part per series is written. Series that aren't stored yet, or whose new rows leave
+    a gap or start before the stored history, are rebuilt from SQL instead.
+    Returns {"appended": [...], "rebuilt": [...]}.
+    """
+    rows = rows[["series_id", "date", "value"]].assign(date=lambda df: pd.to_datetime(df["date"]))
+    starts = rows.groupby("series_id")["date"].min().dt.to_period("M").dt.to_timestamp()
+
+    appendable, to_rebuild, history = [], [], []
+    for series_id, start in starts.items():
+        parts = _parts(series_id, root)
+        if not parts or start <= parts[0][1] or start > parts[-1][2] + pd.DateOffset(months=1):
+            to_rebuild.append(series_id)
+            continue
+        stored = read_table(series_id, ["value"], start - pd.DateOffset(months=LOOKBACK_MONTHS), start - pd.DateOffset(days=1), root)
+        history.append(stored.to_pandas().assign(series_id=series_id))
+        appendable.append(series_id)
+
+    if appendable:
+        new_rows = rows[rows["series_id"].isin(appendable)]
+        features = build_features(regularize(pd.concat([*history, new_rows], ignore_index=True)))
+        for series_id, frame in features.groupby("series_id", sort=False):
+            start = starts[series_id]
+            _truncate_from(series_id, start, root)
+            parts = _parts(series_id, root)
+            _write_part(series_id, parts[-1][0] + 1, frame[frame["date"] >= start].reset_index(drop=True), root)
+            if len(parts) + 1 > MAX_PARTS:
+                compact(series_id, root)
+
+    rebuilt = rebuild(engine, to_rebuild, root) if to_rebuild else []
+    return {"appended": appendable, "rebuilt": rebuilt}
+
+
+def _truncate_from(series_id, start, root=None):
+    """Drops every stored month >= start: later parts are removed, a straddling part rewritten."""
+    for seq, first, last, path in _parts(series_id, root):
+        if last < start:
+            continue
+        if first < start:
+            kept = _read_part(path).to_pandas()
+            _write_part(series_id, seq, kept[kept["date"] < start].reset_index(drop=True), root)
+        path.unlink()
+
+
+def compact(series_id, root=None):
+    """Merges a series' parts into one."""
+    table = read_table(series_id, root=root)
+    if table is not None:
+        _replace_series(series_id, table.to_pandas(), root)
+
+
+# --- CLI ---
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the series-partitioned feature store from raw_series.")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Recompute the features of every (or each --series) series from raw_series.")
+    parser.add_argument("--series", nargs="+", metavar="SERIES_ID", help="Only these series.")
+    parser.add_argument("--compact", action="store_true", help="Merge each series' parts into one file.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    load_dotenv(PROJECT_ROOT / ".env")
+    print(f"🗃️  Feature store: {_version_dir()}")
+
+    if args.rebuild:
+        db_url = os.getenv("DATABASE_URL_ALEMBIC") or os.getenv("DATABASE_URL")
+        if not db_url:
+            print("❌ DATABASE_URL not set.")
+            return
+        engine = create_engine(db_url.replace("postgres://", "postgresql://", 1))
+        rebuilt = rebuild(engine, args.series)
+        print(f"✅ Rebuilt features for {len(rebuilt)} series")
+    if args.compact:
+        for series_id in args.series or stored_series():
+            compact(series_id)
+        print("✅ Compacted")
+
+
+if __name__ == "__main__":
+    main()
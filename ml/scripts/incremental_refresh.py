@@ -0,0 +1,58 @@
+"""
+Incremental model refresh for train_all_models.py.
+
+When new monthly observations arrive, the production model keeps its parameters and
+only the new points are fed through its state-space filter, starting from the
+predicted state stored in the artifact. The one-step-ahead errors of those points
+decide whether the refreshed model is published or the series has drifted and
+pays for a full refit.
+"""
+import numpy as np
+from backtest import smape
+
+MAX_INNOVATION_Z = 3.5   # refit if any standardized one-step error is larger
+MAX_ERROR_RATIO = 3.0    # refit if the new points' one-step sMAPE > ratio x the model's own
+MAX_REFRESHES = 12       # refit after this many refreshes since the last full fit
+
+
+def baseline_smape(metrics):
+    """The model's expected one-step sMAPE: backtest 1-step if present, else in-sample."""
+    backtest = metrics.get("backtest") or {}
+    if backtest.get("sMAPE_by_horizon"):
+        return backtest["sMAPE_by_horizon"][0]
+    return metrics.get("sMAPE")
+
+
+def refresh_model(model, observations, metrics, refreshes=0, max_z=MAX_INNOVATION_Z,
+                  max_error_ratio=MAX_ERROR_RATIO, max_refreshes=MAX_REFRESHES):
+    """
+    Filters `observations` through a CompactStateSpaceModel with its parameters fixed.
+    `metrics` are the model's training metrics and `refreshes` counts refreshes since
+    its last full fit. Returns (refreshed_model, report, reasons); a non-empty
+    `reasons` list means the policy wants a full refit instead.
+    """
+    observations = np.asarray(observations, dtype=np.float64)
+    refreshed, innovations, innovation_vars = model.extend(observations)
+
+    # One-step-ahead forecasts were observation - innovation
+    z = innovations / np.sqrt(innovation_vars)
+    one_step_smape = smape(observations, observations - innovations)
+    baseline = baseline_smape(metrics)
+    report = {
+        "observations": len(observations),
+        "max_abs_z": round(float(np.max(np.abs(z))), 4),
+        "one_step_sMAPE": round(one_step_smape, 4),
+        "baseline_sMAPE": baseline,
+        "refreshes_since_fit": refreshes + 1,
+    }
+
+    reasons = []
+    if not np.all(np.isfinite(z)):
+        reasons.append("non-finite innovations")
+    elif report["max_abs_z"] > max_z:
+        reasons.append(f"|z| {report['max_abs_z']:.2f} > {max_z}")
+    if baseline and one_step_smape > max_error_ratio * baseline:
+        reasons.append(f"one-step sMAPE {one_step_smape:.2f}% > {max_error_ratio} x {baseline:.2f}%")
+    if refreshes + 1 > max_refreshes:
+        reasons.append(f"{refreshes + 1} refreshes since the last full fit")
+    return refreshed, report, reasons
@@ -1,6 +1,14 @@
 import os
+import io
+import time
+import argparse
+import threading
 import requests
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
 from pathlib import Path
@@ -21,6 +29,14 @@ if not DATABASE_URL:
 
 FRED_API_KEY = os.getenv("FRED_API_KEY")
 
+# Overridable so ingestion can be pointed at a local stand-in (see fake_fred_server.py)
+FRED_API_URL = os.getenv("FRED_API_URL", "https://api.stlouisfed.org/fred/series/observations")
+
+# FRED allows 120 requests per minute per API key
+FRED_MAX_REQUESTS_PER_MINUTE = int(os.getenv("FRED_MAX_REQUESTS_PER_MINUTE", "120"))
+FRED_MAX_WORKERS = int(os.getenv("FRED_MAX_WORKERS", "4"))
+FRED_TIMEOUT_SECONDS = float(os.getenv("FRED_TIMEOUT_SECONDS", "30"))
+
 SERIES_TO_FETCH = {
     'WPU101702': 'PPI_STEEL',
     'WPU102': 'PPI_LUMBER',
@@ -32,51 +48,191 @@ SERIES_TO_FETCH = {
 
 # --- FUNCTIONS ---
 
-def fetch_series_data(series_id, api_key):
-    """Fetches a single time series from the FRED API."""
+class RateLimiter:
+    """Spaces out calls across threads so at most `per_minute` start in any minute."""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def create_session(max_connections=FRED_MAX_WORKERS):
+    """
+    Keep-alive session shared by all fetch threads. Retries 429/5xx responses with
+    exponential backoff, honouring Retry-After when FRED sends it.
+    """
+    retry = Retry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def _parse_value(raw):
+    # FRED marks missing observations with "."
+    try:
+        return float(raw)
+    except ValueError:
+        return np.nan
+
+def fetch_series_data(series_id, api_key, observation_start=None, session=None, rate_limiter=None):
+    """Fetches a single time series from the FRED API (optionally only from `observation_start` on)."""
     print(f"Fetching data for series: {series_id}...")
-    url = f"https://api.stlouisfed.org/fred/series/observations?series_id={series_id}&api_key={api_key}&file_type=json"
-    response = requests.get(url)
+    params = {"series_id": series_id, "api_key": api_key, "file_type": "json"}
+    if observation_start is not None:
+        params["observation_start"] = pd.Timestamp(observation_start).strftime('%Y-%m-%d')
+
+    if rate_limiter is not None:
+        rate_limiter.wait()
+    response = (session or requests).get(FRED_API_URL, params=params, timeout=FRED_TIMEOUT_SECONDS)
     response.raise_for_status()
     
-    data = response.json()
-    observations = data.get('observations', [])
+    observations = response.json().get('observations', [])
     
     if not observations:
         print(f"Warning: No observations found for series {series_id}.")
         return pd.DataFrame()
 
-    df = pd.DataFrame(observations)
-    df = df[['date', 'value']]
-    df['date'] = pd.to_datetime(df['date'])
-    df['value'] = pd.to_numeric(df['value'], errors='coerce')
-    df.dropna(inplace=True)
-    return df
+    # Parse straight into typed arrays instead of building an object DataFrame first
+    count = len(observations)
+    dates = np.fromiter((obs['date'] for obs in observations), dtype='datetime64[D]', count=count)
+    values = np.fromiter((_parse_value(obs['value']) for obs in observations), dtype=np.float64, count=count)
+    mask = ~np.isnan(values)
+    return pd.DataFrame({'date': dates[mask].astype('datetime64[ns]'), 'value': values[mask]})
+
+def fetch_all_series(series_map, api_key, latest_dates=None, max_workers=FRED_MAX_WORKERS,
+                     requests_per_minute=FRED_MAX_REQUESTS_PER_MINUTE):
+    """
+    Fetches every series in `series_map` ({fred_code: our_id}) concurrently over one
+    shared session, within FRED's rate limit. Returns (frames, errors) where frames is
+    {our_id: DataFrame} and errors is {fred_code: exception}.
+    """
+    latest_dates = latest_dates or {}
+    session = create_session(max_workers)
+    rate_limiter = RateLimiter(requests_per_minute)
+    frames, errors = {}, {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(fetch_series_data, fred_code, api_key, latest_dates.get(our_id), session, rate_limiter): (fred_code, our_id)
+            for fred_code, our_id in series_map.items()
+        }
+        for future in as_completed(futures):
+            fred_code, our_id = futures[future]
+            try:
+                frames[our_id] = future.result()
+            except Exception as e:
+                errors[fred_code] = e
+
+    session.close()
+    return frames, errors
+
+def get_latest_dates(table_name, engine):
+    """Returns {series_id: latest stored date} in one grouped query."""
+    with engine.connect() as connection:
+        result = connection.execute(text(f"SELECT series_id, MAX(date) FROM {table_name} GROUP BY series_id"))
+        return {row[0]: row[1] for row in result}
+
+# Recomputes the series_catalog rows of the given series from their stored rows
+# (an index-only scan per series). updated_at only moves when something changed.
+CATALOG_UPSERT_SQL = """
+    INSERT INTO series_catalog (series_id, source, first_date, last_date, row_count, last_ingest_hash, updated_at)
+    SELECT series_id,
+           (array_agg(source ORDER BY date DESC))[1],
+           MIN(date), MAX(date), COUNT(*),
+           md5(string_agg(to_char(date, 'YYYY-MM-DD') || '=' || value::text, ',' ORDER BY date)),
+           now()
+    FROM {table_name}
+    WHERE series_id = ANY(:series_ids)
+    GROUP BY series_id
+    ON CONFLICT (series_id) DO UPDATE
+        SET source = EXCLUDED.source, first_date = EXCLUDED.first_date, last_date = EXCLUDED.last_date,
+            row_count = EXCLUDED.row_count, last_ingest_hash = EXCLUDED.last_ingest_hash, updated_at = now()
+        WHERE series_catalog.last_ingest_hash IS DISTINCT FROM EXCLUDED.last_ingest_hash
+           OR series_catalog.source IS DISTINCT FROM EXCLUDED.source
+"""
 
 def save_to_db(df, table_name, engine):
-    """Saves the DataFrame to the DB. Assumes table exists (managed by Alembic)."""
+    """
+    Upserts the DataFrame into the DB. Assumes table exists (managed by Alembic).
+    Rows are COPY'd into a temporary staging table and merged with
+    INSERT ... ON CONFLICT (series_id, date), so only new or changed rows are written.
+    The staged series' series_catalog rows are refreshed in the same transaction.
+    Returns {series_id: {"inserted": n, "updated": n, "unchanged": n}}.
+    """
+    df = df[['series_id', 'date', 'value', 'source']].drop_duplicates(subset=['series_id', 'date'], keep='last')
+    staged = df.groupby('series_id').size().to_dict()
+
     with engine.connect() as connection:
         with connection.begin() as transaction:
             try:
-                # 1. Delete old data for the series being ingested
-                # We trust that the table 'raw_series' already exists.
-                for series_id in df['series_id'].unique():
-                    print(f"Deleting old data for {series_id}...")
-                    connection.execute(text(f"DELETE FROM {table_name} WHERE series_id = :series_id"), {'series_id': series_id})
-
-                # 2. Insert the new data
-                print("Inserting new data...")
-                df.to_sql(table_name, connection, if_exists='append', index=False)
-                
-                print("Data insertion complete.")
+                # 1. Stage the fetched rows with COPY (one round trip for the whole batch)
+                connection.execute(text(
+                    "CREATE TEMP TABLE raw_series_staging "
+                    "(series_id TEXT, date TIMESTAMP, value DOUBLE PRECISION, source TEXT) ON COMMIT DROP"
+                ))
+                buffer = io.StringIO()
+                df.to_csv(buffer, index=False, header=False, date_format='%Y-%m-%d')
+                buffer.seek(0)
+                cursor = connection.connection.cursor()
+                cursor.copy_expert("COPY raw_series_staging (series_id, date, value, source) FROM STDIN WITH CSV", buffer)
+                print(f"Staged {len(df)} rows.")
+
+                # 2. Merge: insert new dates, update only values that actually changed
+                # (xmax = 0 identifies freshly inserted rows in RETURNING)
+                result = connection.execute(text(f"""
+                    INSERT INTO {table_name} (series_id, date, value, source)
+                    SELECT series_id, date, value, source FROM raw_series_staging
+                    ON CONFLICT (series_id, date) DO UPDATE
+                        SET value = EXCLUDED.value, source = EXCLUDED.source
+                        WHERE {table_name}.value IS DISTINCT FROM EXCLUDED.value
+                    RETURNING series_id, (xmax = 0) AS inserted
+                """))
+
+                report = {series_id: {"inserted": 0, "updated": 0, "unchanged": 0} for series_id in staged}
+                for series_id, inserted in result:
+                    report[series_id]["inserted" if inserted else "updated"] += 1
+                for series_id, counts in report.items():
+                    counts["unchanged"] = staged[series_id] - counts["inserted"] - counts["updated"]
+                    print(f"{series_id}: {counts['inserted']} inserted, {counts['updated']} updated, {counts['unchanged']} unchanged")
+
+                # 3. Catalog (series list, date range, row count, content hash) for the API
+                # and training, committed atomically with the rows it describes
+                connection.execute(text(CATALOG_UPSERT_SQL.format(table_name=table_name)), {"series_ids": list(staged)})
+
+                print("Data upsert complete.")
+                return report
             
             except Exception as e:
                 print(f"An error occurred, rolling back: {e}")
                 raise
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest FRED series into raw_series.")
+    parser.add_argument("--full", action="store_true",
+                        help="Re-download each series' full history instead of only observations since the latest stored date.")
+    parser.add_argument("--skip-features", action="store_true",
+                        help="Don't update the feature store (feature_store.py) after the upsert.")
+    return parser.parse_args(argv)
+
 # --- MAIN EXECUTION ---
 if __name__ == "__main__":
-    print("Starting data ingestion process...")
+    args = parse_args()
+    print(f"Starting data ingestion process ({'full' if args.full else 'incremental'})...")
     
     db_url = DATABASE_URL
     if db_url:
@@ -85,21 +241,40 @@ if __name__ == "__main__":
     engine = create_engine(db_url)
     all_series_df = pd.DataFrame()
 
-    for fred_code, our_id in SERIES_TO_FETCH.items():
-        try:
-            series_df = fetch_series_data(fred_code, FRED_API_KEY)
-            if not series_df.empty:
-                series_df['series_id'] = our_id
-                series_df['source'] = 'FRED'
-                all_series_df = pd.concat([all_series_df, series_df], ignore_index=True)
-        except requests.HTTPError as e:
-            print(f"Error fetching data for {fred_code}: {e}")
-        except Exception as e:
-            print(f"An unexpected error occurred for {fred_code}: {e}")
+    # Incremental: ask FRED only for observations from the latest stored date on
+    # (the latest point is re-fetched so revisions to it are picked up)
+    latest_dates = {} if args.full else get_latest_dates('raw_series', engine)
+
+    frames, errors = fetch_all_series(SERIES_TO_FETCH, FRED_API_KEY, latest_dates)
+    for fred_code, error in errors.items():
+        if isinstance(error, requests.HTTPError):
+            print(f"Error fetching data for {fred_code}: {error}")
+        else:
+            print(f"An unexpected error occurred for {fred_code}: {error}")
+
+    series_frames = []
+    for our_id, series_df in frames.items():
+        if not series_df.empty:
+            series_df['series_id'] = our_id
+            series_df['source'] = 'FRED'
+            series_frames.append(series_df)
+    if series_frames:
+        all_series_df = pd.concat(series_frames, ignore_index=True)
 
     if not all_series_df.empty:
-        # The save_to_db function now handles table creation
-        save_to_db(all_series_df, 'raw_series', engine)
+        report = save_to_db(all_series_df, 'raw_series', engine)
+        totals = {key: sum(counts[key] for counts in report.values()) for key in ("inserted", "updated", "unchanged")}
+        print(f"Totals: {totals['inserted']} inserted, {totals['updated']} updated, {totals['unchanged']} unchanged")
+
+        # Append the new months' features (only series whose rows actually changed)
+        changed = [series_id for series_id, counts in report.items() if counts["inserted"] or counts["updated"]]
+        if changed and not args.skip_features:
+            try:
+                import feature_store
+                outcome = feature_store.append(engine, all_series_df[all_series_df['series_id'].isin(changed)])
+                print(f"Feature store: {len(outcome['appended'])} appended, {len(outcome['rebuilt'])} rebuilt")
+            except ImportError as e:
+                print(f"Feature store not updated ({e}).")
     else:
         print("No data was fetched. Database not updated.")
         
@@ -0,0 +1,147 @@
+"""
+SARIMAX order selection for train_all_models.py.
+
+Stepwise search over a bounded (p, q)(P, Q) grid with d = D = 1 and s = 12:
+  * candidates are fitted level by level (level = p + q + P + Q), each level in parallel
+  * every fit warm-starts from the estimates of a fitted neighbour with one term fewer
+  * candidates clearly worse than the incumbent (AIC), or than the best sMAPE on
+    the last HOLDOUT_MONTHS, are pruned and never expanded
+The incumbent/winner is the lowest-AIC candidate whose holdout sMAPE is within tolerance.
+"""
+import time
+import warnings
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+SEASONAL_PERIOD = 12
+DIFFERENCING = (1, 1)          # (d, D), as in the hand-picked model
+DEFAULT_MAX_ORDER = (2, 2, 1, 1)  # max (p, q, P, Q)
+HOLDOUT_MONTHS = 12
+AIC_MARGIN = 10.0              # prune if AIC > incumbent AIC + margin
+SMAPE_TOLERANCE = 1.25         # prune if holdout sMAPE > tolerance x best ...
+SMAPE_SLACK = 0.5              # ... and > best + slack (sMAPE points; tiny errors are noisy)
+CANDIDATE_MAXITER = 50         # candidates only need to be ranked, not fully converged
+
+
+def orders_for(candidate):
+    """(p, q, P, Q) -> SARIMAX (order, seasonal_order)."""
+    p, q, P, Q = candidate
+    return (p, DIFFERENCING[0], q), (P, DIFFERENCING[1], Q, SEASONAL_PERIOD)
+
+
+def build_model(series, order, seasonal_order):
+    return SARIMAX(series,
+                   order=order,
+                   seasonal_order=seasonal_order,
+                   enforce_stationarity=False,
+                   enforce_invertibility=False)
+
+
+def warm_start_params(model, params):
+    """
+    Start values from a neighbouring fit ({param_name: value}): shared parameters keep
+    their estimate and new lag terms start at 0. None lets statsmodels choose.
+    """
+    if not params:
+        return None
+    return np.array([params.get(name, 0.0) for name in model.param_names])
+
+
+def fit_candidate(series, candidate, parent_params=None, holdout=HOLDOUT_MONTHS, maxiter=CANDIDATE_MAXITER):
+    """Fits one candidate on all but the last `holdout` months and scores it on them."""
+    from backtest import smape  # backtest imports this module
+    started = time.perf_counter()
+    train, test = series.iloc[:-holdout], series.iloc[-holdout:]
+    model = build_model(train, *orders_for(candidate))
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            results = model.fit(start_params=warm_start_params(model, parent_params), disp=False, maxiter=maxiter)
+        aic = float(results.aic)
+        if not np.isfinite(aic):
+            raise ValueError("non-finite AIC")
+        return {
+            "candidate": candidate,
+            "aic": aic,
+            "holdout_smape": smape(test.values, np.asarray(results.forecast(steps=len(test)))),
+            "params": dict(zip(results.param_names, (float(v) for v in results.params))),
+            "seconds": time.perf_counter() - started,
+        }
+    except Exception as e:
+        return {"candidate": candidate, "error": str(e), "seconds": time.perf_counter() - started}
+
+
+def _children(candidate, max_order):
+    for i in range(len(candidate)):
+        if candidate[i] < max_order[i]:
+            yield candidate[:i] + (candidate[i] + 1,) + candidate[i + 1:]
+
+
+def _smape_limit(best_smape, tolerance, slack):
+    return max(best_smape * tolerance, best_smape + slack)
+
+
+def search_orders(series, max_order=DEFAULT_MAX_ORDER, workers=1, holdout=HOLDOUT_MONTHS,
+                  aic_margin=AIC_MARGIN, smape_tolerance=SMAPE_TOLERANCE, smape_slack=SMAPE_SLACK):
+    """
+    Returns the selected order and search statistics:
+    {"order", "seasonal_order", "params", "aic", "holdout_smape",
+     "candidates_evaluated", "candidates_pruned", "candidates_failed", "search_seconds"}
+    or None when the series is too short to hold out a validation window.
+    """
+    if len(series) < holdout + 3 * SEASONAL_PERIOD:
+        return None
+
+    started = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    evaluated, pruned = {}, 0
+    best_smape = float("inf")
+    # candidate -> estimates of the neighbour it expands from
+    frontier = {(0, 0, 0, 0): None}
+    try:
+        while frontier:
+            candidates = list(frontier)
+            args = ([series] * len(candidates), candidates, [frontier[c] for c in candidates], [holdout] * len(candidates))
+            level = list(pool.map(fit_candidate, *args)) if pool else list(map(fit_candidate, *args))
+
+            fitted = [r for r in level if "error" not in r]
+            for r in level:
+                evaluated[r["candidate"]] = r
+            if not fitted:
+                break
+            best_smape = min(best_smape, *(r["holdout_smape"] for r in fitted))
+            smape_limit = _smape_limit(best_smape, smape_tolerance, smape_slack)
+            incumbent_aic = min(r["aic"] for r in evaluated.values() if "error" not in r and r["holdout_smape"] <= smape_limit)
+
+            # Only candidates still competitive on both criteria are expanded
+            frontier = {}
+            for r in sorted(fitted, key=lambda r: r["aic"]):
+                if r["aic"] > incumbent_aic + aic_margin or r["holdout_smape"] > smape_limit:
+                    pruned += 1
+                    continue
+                for child in _children(r["candidate"], max_order):
+                    if child not in evaluated and child not in frontier:
+                        frontier[child] = r["params"]
+    finally:
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    fitted = [r for r in evaluated.values() if "error" not in r]
+    if not fitted:
+        return None
+    smape_limit = _smape_limit(best_smape, smape_tolerance, smape_slack)
+    eligible = [r for r in fitted if r["holdout_smape"] <= smape_limit]
+    best = min(eligible, key=lambda r: r["aic"])
+    order, seasonal_order = orders_for(best["candidate"])
+    return {
+        "order": list(order),
+        "seasonal_order": list(seasonal_order),
+        "params": best["params"],
+        "aic": round(best["aic"], 4),
+        "holdout_smape": round(best["holdout_smape"], 4),
+        "candidates_evaluated": len(evaluated),
+        "candidates_pruned": pruned,
+        "candidates_failed": len(evaluated) - len(fitted),
+        "search_seconds": round(time.perf_counter() - started, 3),
+    }
@@ -0,0 +1,130 @@
+"""
+Promotes a trained model version to production (or rolls production back).
+
+The API resolves each series' production model from the `models` registry table
+through an in-process snapshot (app.services.registry) that notices the change
+within REGISTRY_REFRESH_SECONDS. This script also moves the series' Redis version
+pointer to the promoted version's precomputed vector, so cached reads switch at once.
+
+Usage:
+    python ml/scripts/promote_model.py PPI_STEEL 20250101120000   # a specific version
+    python ml/scripts/promote_model.py PPI_STEEL --latest          # the newest version
+    python ml/scripts/promote_model.py PPI_STEEL --rollback        # the version before production
+    python ml/scripts/promote_model.py PPI_STEEL --list
+"""
+import os
+import sys
+import argparse
+from sqlalchemy import create_engine, text
+from pathlib import Path
+from dotenv import load_dotenv
+
+# --- SETUP PATHS ---
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+if os.path.exists('/.dockerenv'):
+    sys.path.insert(0, '/app')
+else:
+    sys.path.insert(0, str(PROJECT_ROOT / "backend"))
+
+try:
+    from app.core.cache import publish_forecast_vector
+except ImportError as e:
+    print(f"❌ Import Error: {e}")
+    sys.exit(1)
+
+VERSIONS_QUERY = text(
+    "SELECT version, is_production, created_at, metrics_json->>'sMAPE' AS smape "
+    "FROM models WHERE name = :name ORDER BY created_at DESC, version DESC"
+)
+VECTOR_QUERY = text(
+    "SELECT start_date, values_json FROM precomputed_forecasts "
+    "WHERE series_id = :name AND model_version = :version"
+)
+
+
+def list_versions(conn, series_id):
+    return conn.execute(VERSIONS_QUERY, {"name": series_id}).fetchall()
+
+
+def pick_version(rows, version=None, latest=False, rollback=False):
+    """Resolves the CLI's version selection against the registry rows (newest first)."""
+    if version:
+        return version if any(row.version == version for row in rows) else None
+    if latest:
+        return rows[0].version if rows else None
+    if rollback:
+        current = next((i for i, row in enumerate(rows) if row.is_production), None)
+        if current is None or current + 1 >= len(rows):
+            return None
+        return rows[current + 1].version
+    return None
+
+
+def promote(conn, series_id, version):
+    """Makes `version` the series' only production row (the partial unique index enforces it)."""
+    conn.execute(text("UPDATE models SET is_production = FALSE WHERE name = :name AND is_production AND version <> :version"),
+                 {"name": series_id, "version": version})
+    conn.execute(text("UPDATE models SET is_production = TRUE WHERE name = :name AND version = :version"),
+                 {"name": series_id, "version": version})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Promote a model version to production.")
+    parser.add_argument("series_id")
+    parser.add_argument("version", nargs="?", help="Registry version to promote.")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--latest", action="store_true", help="Promote the newest version.")
+    group.add_argument("--rollback", action="store_true", help="Promote the version trained before the current production one.")
+    group.add_argument("--list", action="store_true", help="List the registered versions.")
+    args = parser.parse_args(argv)
+
+    load_dotenv(PROJECT_ROOT / ".env")
+    db_url = os.getenv("DATABASE_URL") or os.getenv("DATABASE_URL_ALEMBIC")
+    if not db_url:
+        print("❌ DATABASE_URL not set.")
+        sys.exit(1)
+    engine = create_engine(db_url.replace("postgres://", "postgresql://", 1))
+
+    # 1. Registry rows, newest first
+    with engine.connect() as conn:
+        rows = list_versions(conn, args.series_id)
+    if not rows:
+        print(f"❌ No registered models for {args.series_id}")
+        sys.exit(1)
+
+    if args.list:
+        for row in rows:
+            marker = "⭐" if row.is_production else "  "
+            print(f"{marker} {row.version}  {row.created_at:%Y-%m-%d %H:%M}  sMAPE={row.smape}")
+        return
+
+    if not (args.version or args.latest or args.rollback):
+        parser.error("give a VERSION, --latest or --rollback")
+
+    # 2. Resolve and promote in one transaction (the updated_at trigger bumps the
+    #    registry's change marker, which is what serving polls)
+    version = pick_version(rows, args.version, args.latest, args.rollback)
+    if not version:
+        print(f"❌ No version to promote for {args.series_id}")
+        sys.exit(1)
+    with engine.begin() as conn:
+        promote(conn, args.series_id, version)
+        vector_row = conn.execute(VECTOR_QUERY, {"name": args.series_id, "version": version}).first()
+    print(f"⭐ {args.series_id}: v{version} is now production")
+
+    # 3. Point the Redis cache at the promoted version's vector
+    if vector_row:
+        vector = {
+            "version": version,
+            "start_date": vector_row.start_date.strftime('%Y-%m-%d'),
+            "values": vector_row.values_json,
+        }
+        if publish_forecast_vector(args.series_id, vector):
+            print(f"🔮 Redis pointer moved to v{version}")
+    else:
+        print("⚠️  No precomputed vector for this version; the API computes it on first request")
+
+
+if __name__ == "__main__":
+    main()
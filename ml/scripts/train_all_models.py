@@ -1,13 +1,17 @@
 import os
 import sys
+import time
+import signal
+import argparse
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from sqlalchemy import create_engine, text
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from sqlalchemy import create_engine, text, bindparam
 from sqlalchemy.orm import sessionmaker
-from statsmodels.tsa.statespace.sarimax import SARIMAX
 from pathlib import Path
 from dotenv import load_dotenv
+from order_search import DEFAULT_MAX_ORDER, build_model, search_orders, warm_start_params
 
 # --- SETUP PATHS ---
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
@@ -26,7 +30,12 @@ else:
 # --- IMPORTS (Late imports to ensure sys.path is set) ---
 try:
     from app.core.artifact_manager import ArtifactManager
-    from models import ModelRegistry  # Importing directly from backend/models.py
+    from app.core.cache import publish_forecast_vector
+    from app.core.model_artifact import CompactStateSpaceModel
+    from app.services.forecasting import MAX_FORECAST_HORIZON, build_forecast_vector
+    from backtest import BACKTEST_HORIZON, BACKTEST_MONTHS, backtest, smape
+    from incremental_refresh import MAX_ERROR_RATIO, MAX_INNOVATION_Z, MAX_REFRESHES, refresh_model
+    from models import ModelRegistry, PrecomputedForecast  # Importing directly from backend/models.py
 except ImportError as e:
     print(f"❌ Import Error: {e}")
     print(f"DEBUG: sys.path: {sys.path}")
@@ -71,53 +80,142 @@ def get_git_sha():
     except Exception:
         return "unknown"
 
-def calculate_smape(actual, predicted):
+class TrainingTimeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise TrainingTimeout()
+
+
+def _init_worker():
+    """Runs once in each pool process: never reuse the parent's pooled DB connections."""
+    if engine:
+        engine.dispose(close=False)
+
+
+# Hand-picked model used when order search is off (or the series is too short for it)
+DEFAULT_ORDER = (1, 1, 1)
+DEFAULT_SEASONAL_ORDER = (1, 1, 1, 12)
+
+
+def features_current(series_id, feature_store):
     """
-    Calculates Symmetric Mean Absolute Percentage Error (sMAPE).
-    Range: 0% to 200% (Lower is better)
+    True if the feature store holds the series as raw_series does now: the same last
+    month, and written after the catalog last recorded a change to it (an ingest run
+    with --skip-features, or whose feature update failed, leaves it behind).
     """
-    return 100/len(actual) * np.sum(2 * np.abs(predicted - actual) / (np.abs(actual) + np.abs(predicted)))
+    stored = feature_store.stored_state(series_id)
+    if stored is None:
+        return False
+    last_month, written_at = stored
+    with engine.connect() as conn:
+        row = conn.execute(text(
+            "SELECT MAX(date) AS last_date, "
+            "(SELECT updated_at FROM series_catalog WHERE series_id = :series_id) AS updated_at "
+            "FROM raw_series WHERE series_id = :series_id"
+        ), {"series_id": series_id}).first()
+    if row.last_date is None or pd.Timestamp(row.last_date).to_period("M").to_timestamp() != last_month:
+        return False
+    return row.updated_at is None or row.updated_at.timestamp() <= written_at
 
-def train_and_register(series_id, manager):
-    print(f"\n🏭 Processing: {series_id}...")
-    
-    if not engine:
-        print("   ⚠️  No DB connection. Skipping.")
-        return
+def load_series(series_id, start=None, features=False):
+    """
+    Monthly values of a series (from `start` on) as a date-indexed frame with a
+    `value` column, gaps forward-filled. With `features`, reads the memory-mapped
+    feature store: a stored series that is behind raw_series is rebuilt first, and a
+    series that isn't stored is read from SQL.
+    """
+    if features:
+        import feature_store
+        if feature_store.stored_state(series_id) is None:
+            print(f"   ⚠️  {series_id} is not in the feature store; reading raw_series.")
+        else:
+            current = features_current(series_id, feature_store)
+            if not current:
+                print(f"   ♻️  {series_id}: feature store is behind raw_series; rebuilding it.")
+                current = series_id in feature_store.rebuild(engine, [series_id])
+            if current:
+                df = feature_store.load_features(series_id, columns=["value"], start=start)
+                if df is not None:
+                    return df
 
-    # 1. Fetch Data
-    query = text("SELECT date, value FROM raw_series WHERE series_id = :series_id ORDER BY date")
+    if start is None:
+        query = text("SELECT date, value FROM raw_series WHERE series_id = :series_id ORDER BY date")
+        params = {"series_id": series_id}
+    else:
+        query = text("SELECT date, value FROM raw_series WHERE series_id = :series_id AND date >= :start ORDER BY date")
+        params = {"series_id": series_id, "start": pd.Timestamp(start).date()}
     with engine.connect() as conn:
-        df = pd.read_sql(query, conn, params={"series_id": series_id})
-    
+        df = pd.read_sql(query, conn, params=params)
     if df.empty:
-        print(f"   ⚠️  No data found for {series_id}. Skipping.")
-        return
-
-    # 2. Preprocess
+        return df
     df['date'] = pd.to_datetime(df['date'])
     df.set_index('date', inplace=True)
-    df = df.asfreq('MS').ffill()
+    return df.asfreq('MS').ffill()
+
+def fit_series(series_id, timeout=None, search=None, evaluation=None, features=False):
+    """
+    CPU-bound half of training: loads the series (from the feature store with
+    `features`, else SQL), optionally searches its order
+    (`search` = kwargs for search_orders), fits SARIMAX, backtests it (`evaluation` =
+    kwargs for backtest) and precomputes the forecast vector. Touches no shared state,
+    so it can run in a worker process.
+    Returns a result dict for publish_result(), or None if the series was skipped.
+    """
+    print(f"\n🏭 Processing: {series_id}...")
+    started = time.perf_counter()
     
-    train_start = df.index[0]
-    train_end = df.index[-1]
+    if not engine:
+        print("   ⚠️  No DB connection. Skipping.")
+        return None
+
+    # Per-series time budget (SIGALRM is only available on Unix)
+    use_alarm = bool(timeout) and hasattr(signal, "SIGALRM")
+    if use_alarm:
+        previous_handler = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
 
     try:
-        # 3. Train SARIMAX
-        # (Note: In a real system, you might grid-search these parameters)
-        model = SARIMAX(df['value'], 
-                        order=(1, 1, 1), 
-                        seasonal_order=(1, 1, 1, 12),
-                        enforce_stationarity=False,
-                        enforce_invertibility=False)
-        results = model.fit(disp=False)
-
-        # 4. Calculate Metrics
+        # 1-2. Fetch monthly data (gaps forward-filled)
+        df = load_series(series_id, features=features)
+        if df.empty:
+            print(f"   ⚠️  No data found for {series_id}. Skipping.")
+            return None
+
+        train_start = df.index[0]
+        train_end = df.index[-1]
+
+        # 3. Select the order (stepwise search with warm starts and pruning)
+        order, seasonal_order, selection = DEFAULT_ORDER, DEFAULT_SEASONAL_ORDER, None
+        if search is not None:
+            selection = search_orders(df['value'], **search)
+            if selection:
+                order, seasonal_order = tuple(selection["order"]), tuple(selection["seasonal_order"])
+                print(f"   🔎 Selected SARIMAX{order}x{seasonal_order} from {selection['candidates_evaluated']} "
+                      f"candidates ({selection['candidates_pruned']} pruned) in {selection['search_seconds']:.1f}s")
+
+        # 4. Train SARIMAX on the full history, warm-started from the selected candidate
+        model = build_model(df['value'], order, seasonal_order)
+        results = model.fit(start_params=warm_start_params(model, selection and selection["params"]), disp=False)
+
+        # 5. Calculate Metrics
         fitted_values = results.fittedvalues
-        smape_score = calculate_smape(df['value'], fitted_values)
-        metrics = {"sMAPE": round(smape_score, 4)}
+        smape_score = smape(df['value'], fitted_values)
+        metrics = {"sMAPE": round(smape_score, 4), "order": list(order), "seasonal_order": list(seasonal_order)}
+        if selection:
+            metrics["order_search"] = {key: value for key, value in selection.items() if key not in ("order", "seasonal_order", "params")}
+
+        # 5b. Out-of-sample metrics: rolling-origin backtest (one fit + filter extension)
+        if evaluation is not None:
+            full_params = dict(zip(results.param_names, (float(v) for v in results.params)))
+            evaluation_metrics = backtest(df['value'], order, seasonal_order, params=full_params, **evaluation)
+            if evaluation_metrics:
+                metrics["backtest"] = evaluation_metrics
+                print(f"   🧪 Backtest sMAPE {evaluation_metrics['sMAPE']:.2f}% / MAE {evaluation_metrics['MAE']:.3f} "
+                      f"over {evaluation_metrics['origins']} origins in {evaluation_metrics['seconds']:.2f}s")
 
-        # 5. Prepare Metadata
+        # 6. Prepare Metadata
         version_id = datetime.now().strftime("%Y%m%d_%H%M%S")
         git_sha = get_git_sha()
         
@@ -126,44 +224,313 @@ def train_and_register(series_id, manager):
             "version": version_id,
             "git_sha": git_sha,
             "metrics": metrics,
+            "order": list(order),
+            "seasonal_order": list(seasonal_order),
+            "train_start_date": str(train_start),
             "last_training_date": str(train_end)
         }
         
-        # 6. Save Artifact (S3 or Local)
-        manager.save_model(series_id, results, manifest)
-        print(f"   ✅ Artifact saved ({manager.mode})")
+        # 7. Keep only what forecasting needs (small to ship back from a worker and to store)
+        compact_model = CompactStateSpaceModel.from_results(results)
+
+        # 8. Precompute the max-horizon forecast (serving only slices it)
+        forecast_vector = build_forecast_vector(compact_model, train_end, MAX_FORECAST_HORIZON, version=version_id)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+
+    return {
+        "series_id": series_id,
+        "model": compact_model,
+        "manifest": manifest,
+        "metrics": metrics,
+        "forecast_vector": forecast_vector,
+        "version_id": version_id,
+        "git_sha": git_sha,
+        "train_start": train_start,
+        "train_end": train_end,
+        "fit_seconds": time.perf_counter() - started,
+    }
+
+def production_version(series_id):
+    """The registry's production version of a series, or None."""
+    if not engine:
+        return None
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT version FROM models WHERE name = :name AND is_production"), {"name": series_id}).scalar()
+
+def publish_result(result, manager, promote=False):
+    """
+    I/O half of training: saves the artifact and writes the registry row and forecast
+    vector. Always runs in the parent so DB sessions are never shared across processes.
+    With `promote` the new version becomes the series' production model.
+    """
+    series_id = result["series_id"]
+    version_id = result["version_id"]
+    forecast_vector = result["forecast_vector"]
+    smape_score = result["metrics"]["sMAPE"]
+
+    # 9. Save Artifact (S3 or Local)
+    manager.save_model(series_id, result["model"], result["manifest"])
+    print(f"   ✅ Artifact saved ({manager.mode})")
+
+    # 10. Register in Database (model + its forecast vector)
+    session = SessionLocal()
+    try:
+        # Check if this exact version exists (sanity check)
+        existing = session.query(ModelRegistry).filter_by(name=series_id, version=version_id).first()
+        if not existing:
+            # Serving follows the registry once a series has a production model; before
+            # that it serves the latest version, so the Redis pointer moves with training
+            has_production = session.query(ModelRegistry).filter_by(name=series_id, is_production=True).first() is not None
+            if promote:
+                session.query(ModelRegistry).filter_by(name=series_id, is_production=True).update({"is_production": False})
+            new_model = ModelRegistry(
+                name=series_id,
+                version=version_id,
+                git_sha=result["git_sha"],
+                train_start_date=result["train_start"],
+                train_end_date=result["train_end"],
+                primary_metric="sMAPE",
+                metrics_json=result["metrics"],
+                is_production=promote
+            )
+            session.add(new_model)
+            session.add(PrecomputedForecast(
+                series_id=series_id,
+                model_version=version_id,
+                start_date=pd.to_datetime(forecast_vector["start_date"]),
+                horizon=MAX_FORECAST_HORIZON,
+                values_json=forecast_vector["values"]
+            ))
+            session.commit()
+            print(f"   📝 Registered in DB: {series_id} v{version_id} (sMAPE: {smape_score:.2f}%)"
+                  f"{' [production]' if promote else ''}")
+
+            # 11. Pre-warm the new version's Redis key and (if it is what serving
+            # resolves to) move the series' version pointer to it, only once the DB
+            # commit succeeded
+            serving = promote or not has_production
+            if publish_forecast_vector(series_id, forecast_vector, move_pointer=serving):
+                print(f"   🔮 Published {MAX_FORECAST_HORIZON}-month forecast vector v{version_id}"
+                      f"{'' if serving else ' (not in production; pointer unchanged)'}")
+        else:
+            print(f"   ⚠️  Model version already exists in DB.")
+    except Exception as e:
+        session.rollback()
+        print(f"   ❌ DB Insert Failed: {e}")
+    finally:
+        session.close()
+
+def refresh_series(series_id, manager, policy=None, features=False, promote=False):
+    """
+    Incremental refresh: feeds the observations that arrived after the current
+    artifact's (the production version's, if the registry has one) last_training_date
+    through its filter with the parameters fixed and publishes that as a new version. Returns "refreshed", "current" (no new data)
+    or "refit" when the series has no usable artifact or the drift policy
+    (`policy` = kwargs for refresh_model) rejects the refreshed model.
+    """
+    print(f"\n♻️  Refreshing: {series_id}...")
+    if not engine:
+        print("   ⚠️  No DB connection. Skipping.")
+        return "skipped"
+
+    # 1. Current artifact
+    try:
+        version = production_version(series_id)
+        model = manager.load_model(series_id, version)
+        manifest = manager.load_manifest(series_id, version)
+        last_date = pd.Timestamp(manifest["last_training_date"])
+    except Exception as e:
+        print(f"   ⚠️  No usable artifact ({e}); needs a full fit.")
+        return "refit"
+    if not isinstance(model, CompactStateSpaceModel):
+        # Legacy pickled results still carry the full state-space representation
+        model = CompactStateSpaceModel.from_results(model)
+
+    # 2. Observations after the last training month (plus that month, to fill gaps)
+    df = load_series(series_id, start=last_date, features=features)
+    new = df.loc[df.index > last_date, 'value'] if not df.empty else df
+    if new.empty:
+        print(f"   💤 Up to date (last observation {last_date.date()})")
+        return "current"
 
-        # 7. Register in Database
-        session = SessionLocal()
+    # 3. Filter the new points with the existing parameters and check for drift
+    metrics = manifest.get("metrics", {})
+    refreshes = metrics.get("refresh", {}).get("refreshes_since_fit", 0)
+    refreshed, report, reasons = refresh_model(model, new.values, metrics, refreshes, **(policy or {}))
+    if reasons:
+        print(f"   📉 Drift after {len(new)} new observation(s): {'; '.join(reasons)}. Refitting.")
+        return "refit"
+
+    # 4. Same parameters, new state: publish as a new version
+    version_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+    git_sha = get_git_sha()
+    train_end = new.index[-1]
+    metrics = dict(metrics, refresh=dict(report, refreshed_from=manifest.get("version")))
+    refreshed_manifest = dict(manifest, version=version_id, git_sha=git_sha, metrics=metrics,
+                              last_training_date=str(train_end))
+    train_start = manifest.get("train_start_date")
+    publish_result({
+        "series_id": series_id,
+        "model": refreshed,
+        "manifest": refreshed_manifest,
+        "metrics": metrics,
+        "forecast_vector": build_forecast_vector(refreshed, train_end, MAX_FORECAST_HORIZON, version=version_id),
+        "version_id": version_id,
+        "git_sha": git_sha,
+        "train_start": pd.Timestamp(train_start) if train_start else None,
+        "train_end": train_end,
+    }, manager, promote)
+    print(f"   ♻️  Refreshed v{manifest.get('version')} -> v{version_id} with {len(new)} observation(s) "
+          f"(max |z| {report['max_abs_z']:.2f}, one-step sMAPE {report['one_step_sMAPE']:.2f}%)")
+    return "refreshed"
+
+def refresh_all(materials, manager, policy=None, features=False, promote=False):
+    """
+    Refreshes every series incrementally. Returns ({series_id: (status, seconds)},
+    [series that need a full refit]).
+    """
+    summary, refit = {}, []
+    for material in materials:
+        material_started = time.perf_counter()
         try:
-            # Check if this exact version exists (sanity check)
-            existing = session.query(ModelRegistry).filter_by(name=series_id, version=version_id).first()
-            if not existing:
-                new_model = ModelRegistry(
-                    name=series_id,
-                    version=version_id,
-                    git_sha=git_sha,
-                    train_start_date=train_start,
-                    train_end_date=train_end,
-                    primary_metric="sMAPE",
-                    metrics_json=metrics,
-                    is_production=False  # Default to False
-                )
-                session.add(new_model)
-                session.commit()
-                print(f"   📝 Registered in DB: {series_id} v{version_id} (sMAPE: {smape_score:.2f}%)")
-            else:
-                print(f"   ⚠️  Model version already exists in DB.")
+            status = refresh_series(material, manager, policy, features, promote)
         except Exception as e:
-            session.rollback()
-            print(f"   ❌ DB Insert Failed: {e}")
-        finally:
-            session.close()
+            print(f"   ❌ Refresh Failed: {e}. Refitting.")
+            status = "refit"
+        if status == "refit":
+            refit.append(material)
+        else:
+            summary[material] = (status, time.perf_counter() - material_started)
+    return summary, refit
 
+def warm_forecast_cache(materials):
+    """
+    Republishes the precomputed vector serving resolves to (the production version's,
+    or the newest when the series has no production model) to Redis and points the
+    series at it. Recovers from a Redis flush or a publish that failed after the DB commit.
+    A series whose production version has no stored vector is skipped, never pointed
+    at another version.
+    """
+    if not engine or not materials:
+        return 0
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT DISTINCT ON (p.series_id) p.series_id, p.model_version, p.start_date, p.values_json "
+            "FROM precomputed_forecasts p "
+            "LEFT JOIN models m ON m.name = p.series_id AND m.version = p.model_version AND m.is_production "
+            "WHERE p.series_id IN :series_ids AND (m.id IS NOT NULL OR NOT EXISTS ("
+            "    SELECT 1 FROM models x WHERE x.name = p.series_id AND x.is_production)) "
+            "ORDER BY p.series_id, p.created_at DESC"
+        ).bindparams(bindparam("series_ids", expanding=True)), {"series_ids": list(materials)})
+        warmed = 0
+        for row in rows:
+            vector = {
+                "version": row.model_version,
+                "start_date": row.start_date.strftime('%Y-%m-%d'),
+                "values": row.values_json,
+            }
+            warmed += publish_forecast_vector(row.series_id, vector)
+    return warmed
+
+def train_and_register(series_id, manager, timeout=None, search=None, evaluation=None, features=False, promote=False):
+    """Fits and publishes a single series in the current process."""
+    try:
+        result = fit_series(series_id, timeout=timeout, search=search, evaluation=evaluation, features=features)
+        if result:
+            publish_result(result, manager, promote)
+            return "ok"
+        return "skipped"
+    except TrainingTimeout:
+        print(f"   ❌ Training timed out after {timeout}s: {series_id}")
+        return "timeout"
     except Exception as e:
         print(f"   ❌ Training Failed: {e}")
+        return "failed"
+
+def train_parallel(materials, manager, workers, timeout=None, search=None, evaluation=None, features=False, promote=False):
+    """
+    Fans fit_series() out over a process pool and publishes each result in the
+    parent as it completes. Returns {series_id: (status, seconds)} where seconds is
+    the worker's fit time plus publishing, or time since submission on failure.
+    """
+    summary = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = {}
+        for material in materials:
+            futures[pool.submit(fit_series, material, timeout, search, evaluation, features)] = (material, time.perf_counter())
+
+        for future in as_completed(futures):
+            material, submitted_at = futures[future]
+            seconds = None
+            try:
+                result = future.result()
+                if result:
+                    publish_started = time.perf_counter()
+                    publish_result(result, manager, promote)
+                    seconds = result["fit_seconds"] + time.perf_counter() - publish_started
+                    status = "ok"
+                else:
+                    status = "skipped"
+            except TrainingTimeout:
+                print(f"   ❌ Training timed out after {timeout}s: {material}")
+                status = "timeout"
+            except Exception as e:
+                print(f"   ❌ Training Failed ({material}): {e}")
+                status = "failed"
+            if seconds is None:
+                seconds = time.perf_counter() - submitted_at
+            summary[material] = (status, seconds)
+    return summary
+
+def print_summary(summary, wall_time):
+    print("\n⏱️  Training summary (wall time per series):")
+    for material, (status, seconds) in sorted(summary.items(), key=lambda item: -item[1][1]):
+        print(f"   {material:<20} {status:<10} {seconds:8.2f}s")
+    print(f"   {'TOTAL':<20} {'':<10} {wall_time:8.2f}s")
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train and register SARIMAX models for every series.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of worker processes (1 = train serially in this process).")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="Per-series fit timeout in seconds (Unix only).")
+    parser.add_argument("--search", action="store_true",
+                        help="Select each series' SARIMAX order with a stepwise search instead of (1,1,1)x(1,1,1,12).")
+    parser.add_argument("--max-order", default=",".join(map(str, DEFAULT_MAX_ORDER)), metavar="p,q,P,Q",
+                        help="Largest (p, q, P, Q) the order search may try (default: %(default)s).")
+    parser.add_argument("--search-workers", type=int, default=None,
+                        help="Processes per order search, with --workers 1 only (default: all cores when --workers is 1, else 1).")
+    parser.add_argument("--backtest-months", type=int, default=BACKTEST_MONTHS,
+                        help="Rolling-origin backtest over the last N months (0 disables; default: %(default)s).")
+    parser.add_argument("--backtest-horizon", type=int, default=BACKTEST_HORIZON,
+                        help="Months forecast from each backtest origin (default: %(default)s).")
+    parser.add_argument("--series", nargs="+", metavar="SERIES_ID",
+                        help="Only train these series (default: every series in the series catalog).")
+    parser.add_argument("--promote", action="store_true",
+                        help="Make each new version its series' production model in the registry (see promote_model.py).")
+    parser.add_argument("--feature-store", action="store_true",
+                        help="Load series from the memory-mapped feature store (feature_store.py) instead of SQL.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Refresh existing models with only their new observations; refit just the series that drifted.")
+    parser.add_argument("--max-innovation-z", type=float, default=MAX_INNOVATION_Z,
+                        help="Incremental: refit if a new point's standardized one-step error exceeds this (default: %(default)s).")
+    parser.add_argument("--max-error-ratio", type=float, default=MAX_ERROR_RATIO,
+                        help="Incremental: refit if the new points' one-step sMAPE exceeds this multiple of the model's (default: %(default)s).")
+    parser.add_argument("--max-refreshes", type=int, default=MAX_REFRESHES,
+                        help="Incremental: refit after this many refreshes since the last full fit (default: %(default)s).")
+    parser.add_argument("--warm-cache", action="store_true",
+                        help="Skip training; republish the newest stored forecast vectors to Redis.")
+    args = parser.parse_args(argv)
+    # Series run in daemonic pool workers, which can't start a search pool of their own
+    if args.workers > 1 and args.search_workers is not None and args.search_workers > 1:
+        parser.error("--search-workers > 1 needs --workers 1 (parallel series already use the cores)")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
     try:
         manager = ArtifactManager()
         print(f"📦 Storage Mode: {manager.mode}")
@@ -173,17 +540,55 @@ def main():
         return
 
     # Get list of materials
-    if engine:
+    if args.series:
+        materials = args.series
+    elif engine:
         with engine.connect() as conn:
-            result = conn.execute(text("SELECT DISTINCT series_id FROM raw_series"))
+            # series_catalog has one row per series (maintained by ingestion)
+            result = conn.execute(text("SELECT series_id FROM series_catalog ORDER BY series_id"))
             materials = [row[0] for row in result]
     else:
         materials = []
 
+    if args.warm_cache:
+        print(f"🔥 Warmed {warm_forecast_cache(materials)}/{len(materials)} forecast vectors in Redis")
+        return
+
+    started = time.perf_counter()
+    summary = {}
+    if args.incremental:
+        policy = {"max_z": args.max_innovation_z, "max_error_ratio": args.max_error_ratio, "max_refreshes": args.max_refreshes}
+        summary, materials = refresh_all(materials, manager, policy, args.feature_store, args.promote)
+        print(f"\n♻️  Refreshed {sum(s == 'refreshed' for s, _ in summary.values())}, "
+              f"{sum(s == 'current' for s, _ in summary.values())} up to date, {len(materials)} need a full refit.")
+
     print(f"🎯 Found {len(materials)} materials to train.")
 
-    for material in materials:
-        train_and_register(material, manager)
+    search = None
+    parallel = args.workers > 1 and len(materials) > 1
+    if args.search:
+        # Cores go to series-level parallelism when there is any; pool workers can't nest pools
+        search_workers = 1 if parallel else (args.search_workers or os.cpu_count() or 1)
+        search = {"max_order": tuple(int(v) for v in args.max_order.split(",")), "workers": search_workers}
+        print(f"🔎 Order search up to (p,q,P,Q)={search['max_order']} with {search['workers']} process(es) per series")
+
+    evaluation = None
+    if args.backtest_months > 0:
+        evaluation = {"test_months": args.backtest_months, "horizon": args.backtest_horizon}
+
+    if parallel:
+        print(f"🧵 Training in parallel with {args.workers} workers")
+        summary.update(train_parallel(materials, manager, args.workers, timeout=args.timeout, search=search, evaluation=evaluation,
+                                      features=args.feature_store, promote=args.promote))
+    else:
+        for material in materials:
+            material_started = time.perf_counter()
+            status = train_and_register(material, manager, timeout=args.timeout, search=search, evaluation=evaluation,
+                                        features=args.feature_store, promote=args.promote)
+            summary[material] = (status, time.perf_counter() - material_started)
+
+    print_summary(summary, time.perf_counter() - started)
+    return summary
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()